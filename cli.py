@@ -6,15 +6,11 @@ Versión CLI para probar funcionalidad sin GUI
 
 import sys
 import os
-import argparse
-from pathlib import Path
+import hashlib
 
 # Agregar el directorio src al path para imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from core.processor import FileProcessor
-from core.recovery import RecoveryManager
-
 
 def create_test_file():
     """Crear archivo de prueba con datos sensibles"""
@@ -49,6 +45,8 @@ Este archivo contiene información confidencial que debe ser anonimizada.
 
 def process_file_cli(file_path: str, output_dir: str = "examples/output", password: str = None):
     """Procesar archivo usando CLI"""
+    from core.processor import FileProcessor, recovery_key_filename
+    
     processor = FileProcessor()
     
     print(f"🔍 Procesando archivo: {file_path}")
@@ -79,9 +77,7 @@ def process_file_cli(file_path: str, output_dir: str = "examples/output", passwo
         print(f"📁 Archivo sanitizado: {os.path.join(output_dir, result.sanitized_filename)}")
         
         if result.recovery_key:
-            recovery_filename = result.sanitized_filename.replace('.', '_recovery_key.')
-            if not recovery_filename.endswith('.json'):
-                recovery_filename += '.json'
+            recovery_filename = recovery_key_filename(result.sanitized_filename)
             print(f"🔑 Llave de recuperación: {os.path.join(output_dir, recovery_filename)}")
         
         print(f"\n📈 Estadísticas:")
@@ -101,6 +97,8 @@ def process_file_cli(file_path: str, output_dir: str = "examples/output", passwo
 
 def recover_file_cli(processed_file: str, recovery_key_file: str, password: str = None, output_file: str = None):
     """Recuperar archivo usando CLI"""
+    from core.recovery import RecoveryManager
+    
     recovery_manager = RecoveryManager()
     
     print(f"🔄 Recuperando archivo: {processed_file}")
@@ -134,6 +132,31 @@ def recover_file_cli(processed_file: str, recovery_key_file: str, password: str
         return False
 
 
+def calibrate_kdf_cli():
+    """Calibrar PBKDF2 para esta máquina y guardar el resultado"""
+    from core.security import SecurityManager
+    
+    security_manager = SecurityManager()
+    print("⏱️  Calibrando iteraciones de PBKDF2...")
+    try:
+        iterations = security_manager.calibrate_kdf_iterations(security_manager.kdf_algorithm, persist=True)
+    except OSError as e:
+        print(f"❌ No se pudo guardar la calibración: {e}")
+        return False
+    
+    print(f"✅ {iterations} iteraciones ({security_manager.kdf_algorithm}) guardadas en {SecurityManager._KDF_CONFIG_PATH}")
+    return True
+
+
+def hash_file(file_path: str, chunk_size: int = 65536) -> bytes:
+    """Calcular SHA-256 de un archivo leyéndolo por bloques"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.digest()
+
+
 def demo_complete_workflow():
     """Demostración completa del flujo de trabajo"""
     print("🚀 DEMO: Flujo completo de Data Sanitizer\n")
@@ -151,9 +174,17 @@ def demo_complete_workflow():
         return
     
     # 3. Verificar archivos de salida
-    output_dir = Path("examples/output")
-    sanitized_files = list(output_dir.glob("*_sanitized_*.txt"))
-    recovery_files = list(output_dir.glob("*_recovery_key_*.json"))
+    # Una sola pasada por el directorio clasificando cada entrada por nombre
+    sanitized_files = []
+    recovery_files = []
+    with os.scandir("examples/output") as entries:
+        for entry in entries:
+            name = entry.name
+            if "_recovery_key" in name:
+                if name.endswith(".json"):
+                    recovery_files.append(entry.path)
+            elif "_sanitized_" in name and name.endswith(".txt"):
+                sanitized_files.append(entry.path)
     
     if not sanitized_files or not recovery_files:
         print("❌ No se encontraron archivos de salida")
@@ -180,13 +211,8 @@ def demo_complete_workflow():
     
     if success:
         print(f"\n6️⃣ Verificando recuperación...")
-        # Comparar archivos
-        with open("examples/input/test_file.txt", 'r') as f:
-            original = f.read()
-        with open(recovered_file, 'r') as f:
-            recovered = f.read()
-        
-        if original.strip() == recovered.strip():
+        # Comparar archivos por hash sin cargarlos completos en memoria
+        if hash_file("examples/input/test_file.txt") == hash_file(recovered_file):
             print("✅ ¡Recuperación perfecta! Los archivos son idénticos.")
         else:
             print("⚠️  Los archivos difieren ligeramente")
@@ -194,8 +220,25 @@ def demo_complete_workflow():
     print(f"\n🎉 ¡Demo completado! Revisa los archivos en examples/output/")
 
 
-def main():
-    """Función principal CLI"""
+# Comandos soportados: (argumentos posicionales, opciones con sus valores por defecto)
+COMMANDS = {
+    'process': (('file',), {'output': 'examples/output', 'password': None}),
+    'recover': (('processed_file', 'recovery_key'), {'password': None, 'output': None}),
+    'demo': ((), {}),
+    'test': ((), {}),
+    'calibrate-kdf': ((), {}),
+}
+
+OPTION_ALIASES = {
+    '--output': 'output', '-o': 'output',
+    '--password': 'password', '-p': 'password',
+}
+
+
+def build_parser():
+    """Construir parser argparse (solo para ayuda y errores de uso)"""
+    import argparse
+    
     parser = argparse.ArgumentParser(description="Data Sanitizer - CLI")
     
     subparsers = parser.add_subparsers(dest='command', help='Comandos disponibles')
@@ -214,21 +257,70 @@ def main():
     recover_parser.add_argument('--output', '-o', help='Archivo de salida')
     
     # Comando demo
-    demo_parser = subparsers.add_parser('demo', help='Ejecutar demostración completa')
+    subparsers.add_parser('demo', help='Ejecutar demostración completa')
     
     # Comando test
-    test_parser = subparsers.add_parser('test', help='Crear archivo de prueba')
+    subparsers.add_parser('test', help='Crear archivo de prueba')
+    
+    # Comando calibrate-kdf
+    subparsers.add_parser('calibrate-kdf', help='Calibrar y guardar las iteraciones de PBKDF2')
+    
+    return parser
+
+
+def parse_args_fast(argv):
+    """Parsear los usos habituales sin argparse; None si hay que delegar en argparse"""
+    if not argv or argv[0] not in COMMANDS:
+        return None
+    
+    positional_names, defaults = COMMANDS[argv[0]]
+    args = dict(defaults, command=argv[0])
+    positionals = []
     
-    args = parser.parse_args()
+    i = 1
+    while i < len(argv):
+        token = argv[i]
+        if token.startswith('-'):
+            # Solo las opciones largas admiten la forma --opcion=valor
+            name, sep, value = token.partition('=') if token.startswith('--') else (token, '', '')
+            option = OPTION_ALIASES.get(name)
+            if option not in defaults:
+                return None  # Opción desconocida o -h/--help: argparse se encarga
+            if not sep:
+                i += 1
+                if i >= len(argv) or argv[i].startswith('-'):
+                    return None
+                value = argv[i]
+            args[option] = value
+        else:
+            positionals.append(token)
+        i += 1
+    
+    if len(positionals) != len(positional_names):
+        return None
+    
+    args.update(zip(positional_names, positionals))
+    return args
+
+
+def main():
+    """Función principal CLI"""
+    args = parse_args_fast(sys.argv[1:])
+    if args is None:
+        parser = build_parser()
+        args = vars(parser.parse_args())
     
-    if args.command == 'process':
-        process_file_cli(args.file, args.output, args.password)
-    elif args.command == 'recover':
-        recover_file_cli(args.processed_file, args.recovery_key, args.password, args.output)
-    elif args.command == 'demo':
+    command = args.get('command')
+    if command == 'process':
+        process_file_cli(args['file'], args['output'], args['password'])
+    elif command == 'recover':
+        recover_file_cli(args['processed_file'], args['recovery_key'], args['password'], args['output'])
+    elif command == 'demo':
         demo_complete_workflow()
-    elif args.command == 'test':
+    elif command == 'test':
         create_test_file()
+    elif command == 'calibrate-kdf':
+        calibrate_kdf_cli()
     else:
         parser.print_help()
 
@@ -12,8 +12,6 @@ from pathlib import Path
 # Agregar el directorio src al path para imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from gui.main_window import DataSanitizerGUI
-
 
 def parse_arguments():
     """Parsear argumentos de línea de comandos"""
@@ -57,8 +55,9 @@ def main():
         print("Modo CLI no implementado aún. Use la interfaz gráfica.")
         sys.exit(1)
     else:
-        # Modo GUI
+        # Modo GUI (tkinter y el núcleo solo se cargan aquí)
         try:
+            from gui.main_window import DataSanitizerGUI
             app = DataSanitizerGUI()
             app.run()
         except KeyboardInterrupt:
@@ -6,6 +6,12 @@ with open("README.md", "r", encoding="utf-8") as fh:
 with open("requirements.txt", "r", encoding="utf-8") as fh:
     requirements = [line.strip() for line in fh if line.strip() and not line.startswith("#")]
 
+# Aceleradores opcionales: el código usa una alternativa si no están instalados
+speedups = [
+    "fastpbkdf2>=0.2",
+    "orjson>=3.0",  # dumps/loads y OPT_INDENT_2
+]
+
 setup(
     name="data-sanitizer",
     version="0.1.0",
@@ -31,6 +37,9 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        "speedups": speedups,
+    },
     entry_points={
         "console_scripts": [
             "data-sanitizer=src.main:main",
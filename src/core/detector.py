@@ -3,10 +3,73 @@ Módulo de detección de datos sensibles
 Identifica automáticamente diferentes tipos de información sensible en texto
 """
 
+import atexit
+import heapq
+import math
+import multiprocessing
+import os
+import pickle
 import re
-from typing import List, Dict, Tuple, Any
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from operator import itemgetter
+from typing import List, Dict, Tuple, Any, Iterable, Iterator, Optional
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+
+# Pool de procesos para textos grandes: se crea al primer uso y se reutiliza mientras
+# el detector no cambie (sus procesos reciben el detector una sola vez al iniciarse).
+# Sus procesos se lanzan con spawn: hacer fork de un proceso con hilos (la GUI detecta
+# desde un ThreadPoolExecutor junto al hilo de Tk) no es seguro
+_parallel_pool: Optional[ProcessPoolExecutor] = None
+_parallel_pool_state: Optional[bytes] = None
+_parallel_pool_lock = threading.Lock()
+_worker_detector = None  # Detector de cada proceso del pool
+
+
+def _init_parallel_worker(state: bytes):
+    """Instalar en el proceso del pool el detector serializado por el proceso principal"""
+    global _worker_detector
+    _worker_detector = pickle.loads(state)
+
+
+def _detect_groups_worker(text: str, groups: List[Tuple[Any, List[re.Pattern]]]) -> List[List[Tuple]]:
+    """Detectar varios tipos sobre un texto recibido una vez por tarea"""
+    return [_worker_detector._detect_type(text, data_type, patterns) for data_type, patterns in groups]
+
+
+def _get_parallel_pool(state: bytes) -> ProcessPoolExecutor:
+    """Pool compartido iniciado con este estado del detector (se recrea si cambió)"""
+    global _parallel_pool, _parallel_pool_state
+    with _parallel_pool_lock:
+        if _parallel_pool is None or _parallel_pool_state != state:
+            if _parallel_pool is not None:
+                _parallel_pool.shutdown(wait=False)  # Las tareas ya enviadas terminan igualmente
+            _parallel_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_parallel_worker,
+                initargs=(state,)
+            )
+            _parallel_pool_state = state
+        return _parallel_pool
+
+
+def _shutdown_parallel_pool():
+    """Cerrar el pool compartido (se volverá a crear si hace falta)"""
+    global _parallel_pool, _parallel_pool_state
+    with _parallel_pool_lock:
+        if _parallel_pool is not None:
+            _parallel_pool.shutdown()
+        _parallel_pool = None
+        _parallel_pool_state = None
+
+
+atexit.register(_shutdown_parallel_pool)
 
 
 class SensitiveDataType(Enum):
@@ -25,7 +88,22 @@ class SensitiveDataType(Enum):
     ACCESS_TOKEN = "access_token"
 
 
-@dataclass
+# Patrones genéricos de keys/tokens: se pre-filtran buscando rachas de su clase de carácter
+_GENERIC_KEY_PATTERN = r'\b[A-Za-z0-9]{32,64}\b(?=\s|$|["\',}])'
+_GENERIC_TOKEN_PATTERN = r'\b[A-Za-z0-9+/]{40,}\b(?=\s|$|["\',}])'
+
+
+def _char_class_table(extra: bytes = b'') -> bytes:
+    """Tabla para bytes.translate que marca con b'a' los alfanuméricos ASCII (y extra)"""
+    members = set(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789' + extra)
+    return bytes(ord('a') if byte in members else ord(' ') for byte in range(256))
+
+
+# slots=True solo existe desde Python 3.10; en versiones anteriores se omite
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class Detection:
     """Representa una detección de dato sensible"""
     data_type: SensitiveDataType
@@ -39,14 +117,68 @@ class Detection:
 class SensitiveDataDetector:
     """Detector principal de datos sensibles"""
     
+    # Fragmentos de rutas del sistema, buscados en una sola pasada sin distinguir mayúsculas
+    _SYSTEM_PATH_RE = re.compile(
+        '|'.join(re.escape(sys_path) for sys_path in ['/usr/', '/bin/', '/sbin/', '/opt/', '/etc/', '/var/log']),
+        re.IGNORECASE | re.ASCII
+    )
+    
+    # Confianza por prefijo conocido (4 caracteres, o 3 para JWT)
+    _PREFIX_CONFIDENCE = {
+        SensitiveDataType.API_KEY: {
+            'ghp_': 0.98, 'gho_': 0.98, 'ghu_': 0.98, 'ghs_': 0.98, 'ghr_': 0.98,  # GitHub tokens
+            'AIza': 0.98,  # Google API keys
+            'AKIA': 0.98,  # AWS keys
+        },
+        SensitiveDataType.ACCESS_TOKEN: {
+            'pat-': 0.98,  # HubSpot tokens
+            'ntn_': 0.98,  # Notion tokens
+            'eyJ': 0.95,   # JWT tokens
+        },
+    }
+    
+    # Longitud mínima para considerar una key/token genérica
+    _GENERIC_TOKEN_MIN_LENGTH = {
+        SensitiveDataType.API_KEY: 32,
+        SensitiveDataType.ACCESS_TOKEN: 40,
+    }
+    
+    # Fragmentos obligatorios por tipo: sin al menos uno de ellos el tipo no puede coincidir
+    _REQUIRED_CHARS = {
+        SensitiveDataType.EMAIL: ('@',),
+        SensitiveDataType.URL: ('://',),
+        SensitiveDataType.FILE_PATH: ('/', '\\'),
+    }
+    
+    # Tipos cuyos patrones siempre contienen dígitos
+    _DIGIT_TYPES = frozenset({
+        SensitiveDataType.PHONE,
+        SensitiveDataType.CREDIT_CARD,
+        SensitiveDataType.DATE,
+    })
+    
+    _DIGIT_RE = re.compile(r'\d')
+    
+    # Patrones genéricos que requieren una racha mínima de su clase de carácter:
+    # (tabla de clases para bytes.translate, longitud mínima de la racha)
+    _CHAR_RUN_GATES = {
+        _GENERIC_KEY_PATTERN: (_char_class_table(), 32),
+        _GENERIC_TOKEN_PATTERN: (_char_class_table(b'+/'), 40),
+    }
+    
+    # Entropía mínima (bits por carácter) de una API key o token genérico
+    _MIN_KEY_ENTROPY = 3.5
+    
     def __init__(self):
         """Inicializar detector con patrones predefinidos"""
         self.patterns = self._load_patterns()
         self.min_confidence = 0.7
+        self.parallel_threshold = 1024 * 1024  # Caracteres a partir de los cuales se usa un pool de procesos
+        self._custom_types = set()  # Tipos con patrones personalizados (sin sondeo de caracteres)
     
-    def _load_patterns(self) -> Dict[SensitiveDataType, List[str]]:
-        """Cargar patrones regex para cada tipo de dato"""
-        return {
+    def _load_patterns(self) -> Dict[SensitiveDataType, List[re.Pattern]]:
+        """Cargar y precompilar patrones regex para cada tipo de dato"""
+        raw_patterns = {
             SensitiveDataType.EMAIL: [
                 r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
             ],
@@ -65,13 +197,13 @@ class SensitiveDataDetector:
             
             SensitiveDataType.FILE_PATH: [
                 # Rutas específicas que SÍ son sensibles (no rutas del sistema)
-                r'/(?:home|Users)/[^/\s"\']+(?:/[^/\s"\']+)*',  # Rutas de usuario
-                r'[A-Za-z]:\\(?:Users|Documents)\\(?:[^\\/:*?"<>|\r\n\'"]+\\)*[^\\/:*?"<>|\r\n\'"]*',  # Windows user paths
+                r'/(?i:home|Users)/[^/\s"\']+(?:/[^/\s"\']+)*',  # Rutas de usuario
+                r'[A-Za-z]:\\(?i:Users|Documents)\\(?:[^\\/:*?"<>|\r\n\'"]+\\)*[^\\/:*?"<>|\r\n\'"]*',  # Windows user paths
                 r'~[/\\](?:[^/\\\s"\']+[/\\])*[^/\\\s"\']*'  # Home paths
             ],
             
             SensitiveDataType.URL: [
-                r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?'
+                r'(?i:https?)://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?'
             ],
             
             SensitiveDataType.CREDIT_CARD: [
@@ -98,7 +230,7 @@ class SensitiveDataDetector:
                 # AWS keys
                 r'\bAKIA[A-Z0-9]{16}\b',
                 # Generic API key patterns
-                r'\b[A-Za-z0-9]{32,64}\b(?=\s|$|["\',}])',  # 32-64 char strings
+                _GENERIC_KEY_PATTERN,  # 32-64 char strings
             ],
             
             SensitiveDataType.ACCESS_TOKEN: [
@@ -109,43 +241,151 @@ class SensitiveDataDetector:
                 # JWT tokens
                 r'\beyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\b',
                 # Bearer tokens
-                r'\b[A-Za-z0-9+/]{40,}\b(?=\s|$|["\',}])',
+                _GENERIC_TOKEN_PATTERN,
             ]
         }
+        
+        # Sin re.IGNORECASE: los prefijos de tokens distinguen mayúsculas y los
+        # pocos fragmentos que no lo hacen llevan (?i:...) en el propio patrón
+        return {
+            data_type: [re.compile(pattern) for pattern in patterns]
+            for data_type, patterns in raw_patterns.items()
+        }
+    
+    def add_patterns(self, data_type: SensitiveDataType, patterns: List[str], flags: int = 0):
+        """Agregar patrones personalizados (los ya presentes no se duplican)"""
+        existing = self.patterns.setdefault(data_type, [])
+        known = {(pattern.pattern, pattern.flags) for pattern in existing}
+        for source in patterns:
+            compiled = re.compile(source, flags)
+            if (compiled.pattern, compiled.flags) not in known:
+                known.add((compiled.pattern, compiled.flags))
+                existing.append(compiled)
+        self._custom_types.add(data_type)
+    
+    def _candidate_patterns(self, text: str) -> Dict[SensitiveDataType, List[re.Pattern]]:
+        """Descartar los patrones que no pueden aparecer en el texto"""
+        has_digit = self._DIGIT_RE.search(text) is not None
+        
+        candidates = {}
+        for data_type, patterns in self.patterns.items():
+            # Sondeo barato: faltan los caracteres que los patrones predefinidos necesitan
+            if data_type not in self._custom_types:
+                required = self._REQUIRED_CHARS.get(data_type)
+                if required and not any(chars in text for chars in required):
+                    continue
+                if data_type in self._DIGIT_TYPES and not has_digit:
+                    continue
+            
+            candidates[data_type] = patterns
+        
+        # Los patrones genéricos solo se ejecutan si existe una racha suficientemente larga
+        encoded = None  # UTF-8 del texto, se codifica solo si algún patrón lo necesita
+        for data_type, patterns in candidates.items():
+            if not any(pattern.pattern in self._CHAR_RUN_GATES for pattern in patterns):
+                continue
+            if encoded is None:
+                encoded = text.encode('utf-8', 'surrogatepass')
+            candidates[data_type] = [
+                pattern for pattern in patterns
+                if pattern.pattern not in self._CHAR_RUN_GATES
+                or self._has_char_run(encoded, *self._CHAR_RUN_GATES[pattern.pattern])
+            ]
+        return candidates
+    
+    @staticmethod
+    def _has_char_run(encoded: bytes, table: bytes, min_length: int) -> bool:
+        """Buscar una racha de min_length bytes de la clase marcada en la tabla"""
+        # Los bytes no ASCII de UTF-8 quedan fuera de la clase, igual que en el patrón
+        return b'a' * min_length in encoded.translate(table)
     
     def detect_all(self, text: str) -> List[Detection]:
         """Detectar todos los tipos de datos sensibles en el texto"""
-        detections = []
+        # Las coincidencias viajan como tuplas (inicio, fin, confianza, tipo, texto);
+        # los objetos Detection y su contexto solo se crean para las que sobreviven
         
-        for data_type, patterns in self.patterns.items():
-            detections.extend(self._detect_type(text, data_type, patterns))
+        # Pre-filtrado: solo se ejecutan los patrones que pueden tener coincidencias
+        candidates = self._candidate_patterns(text)
+        
+        if len(text) >= self.parallel_threshold:
+            streams = self._detect_parallel(text, candidates)
+        else:
+            streams = self._detect_sequential(text, candidates)
         
-        # Ordenar por posición en el texto
-        detections.sort(key=lambda x: x.start_position)
+        # Mezclar los flujos ya ordenados por posición (estable: respeta el orden de los flujos)
+        matches = heapq.merge(*streams, key=itemgetter(0))
         
-        # Resolver conflictos de superposición
-        return self._resolve_overlaps(detections)
+        # Resolver conflictos de superposición (el resultado queda ordenado por inicio;
+        # _apply_replacements depende de este orden)
+        return [
+            Detection(
+                data_type=data_type,
+                original_text=original_text,
+                start_position=start,
+                end_position=end,
+                confidence=confidence,
+                context=self._extract_context(text, start, end)
+            )
+            for start, end, confidence, data_type, original_text
+            in self._resolve_overlaps(matches)
+        ]
     
-    def _detect_type(self, text: str, data_type: SensitiveDataType, patterns: List[str]) -> List[Detection]:
-        """Detectar un tipo específico de dato sensible"""
-        detections = []
+    def _detect_sequential(self, text: str,
+                           candidates: Dict[SensitiveDataType, List[re.Pattern]]) -> List[Iterator[Tuple]]:
+        """Un generador por patrón, cada uno ordenado por posición"""
+        return [
+            self._scan_pattern(text, data_type, pattern)
+            for data_type, patterns in candidates.items()
+            for pattern in patterns
+        ]
+    
+    def _detect_parallel(self, text: str,
+                         candidates: Dict[SensitiveDataType, List[re.Pattern]]) -> List[Iterable[Tuple]]:
+        """Repartir los tipos de dato entre procesos (re no libera el GIL)"""
+        groups = [(data_type, patterns) for data_type, patterns in candidates.items() if patterns]
+        workers = min(len(groups), os.cpu_count() or 1)
+        if workers < 2:
+            return self._detect_sequential(text, candidates)
+        
+        try:
+            executor = _get_parallel_pool(pickle.dumps(self))
+            # Una tarea por proceso: el texto se serializa una vez por proceso, no por tipo
+            futures = [
+                executor.submit(_detect_groups_worker, text, groups[i::workers])
+                for i in range(workers)
+            ]
+            results = [future.result() for future in futures]
+        except (OSError, BrokenProcessPool):
+            # Sin soporte de multiprocessing en este entorno: volver al modo secuencial
+            _shutdown_parallel_pool()
+            return self._detect_sequential(text, candidates)
         
+        # Conservar el orden de los grupos para el desempate de la mezcla
+        streams = [None] * len(groups)
+        for i, bundle in enumerate(results):
+            streams[i::workers] = bundle
+        return streams
+    
+    def _detect_type(self, text: str, data_type: SensitiveDataType,
+                     patterns: List[re.Pattern]) -> List[Tuple[int, int, float, SensitiveDataType, str]]:
+        """Detectar un tipo específico de dato sensible (resultado ordenado por posición)"""
+        matches = []
         for pattern in patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                context = self._extract_context(text, match.start(), match.end())
-                detection = Detection(
-                    data_type=data_type,
-                    original_text=match.group(),
-                    start_position=match.start(),
-                    end_position=match.end(),
-                    confidence=self._calculate_confidence(match.group(), data_type, context),
-                    context=context
-                )
-                
-                if detection.confidence >= self.min_confidence:
-                    detections.append(detection)
+            matches.extend(self._scan_pattern(text, data_type, pattern))
         
-        return detections
+        matches.sort(key=itemgetter(0))
+        return matches
+    
+    def _scan_pattern(self, text: str, data_type: SensitiveDataType,
+                      pattern: re.Pattern) -> Iterator[Tuple[int, int, float, SensitiveDataType, str]]:
+        """Generar las coincidencias de un patrón que superan la confianza mínima"""
+        for match in pattern.finditer(text):
+            original_text = match.group()
+            # La confianza no depende del contexto: se extrae después, solo para las sobrevivientes
+            confidence = self._calculate_confidence(original_text, data_type)
+            if confidence >= self.min_confidence:
+                start, end = match.span()
+                yield start, end, confidence, data_type, original_text
     
     def _calculate_confidence(self, text: str, data_type: SensitiveDataType, context: str = "") -> float:
         """Calcular confianza de la detección"""
@@ -171,7 +411,8 @@ class SensitiveDataDetector:
             parts = text.split('.')
             if len(parts) == 4:
                 try:
-                    if all(0 <= int(part) <= 255 for part in parts):
+                    # Los octetos ya son dígitos por el patrón: basta con el máximo
+                    if max(map(int, parts)) <= 255:
                         base_confidence = 0.95
                     else:
                         base_confidence = 0.3  # Fuera de rango válido
@@ -184,62 +425,68 @@ class SensitiveDataDetector:
                 base_confidence = 0.4
             elif text.startswith('http'):
                 base_confidence = 0.2  # Probablemente parte de URL
-            elif any(sys_path in text.lower() for sys_path in ['/usr/', '/bin/', '/sbin/', '/opt/', '/etc/', '/var/log']):
+            elif self._SYSTEM_PATH_RE.search(text):
                 base_confidence = 0.3  # Rutas del sistema, menor confianza
             elif 'node_modules' in text or '.nvm' in text:
                 base_confidence = 0.4  # Rutas de herramientas, menor confianza
-            elif text.startswith('/home/') or text.startswith('/Users/') or '~/' in text:
+            elif text.startswith(('/home/', '/Users/')) or '~/' in text:
                 base_confidence = 0.9  # Rutas de usuario, alta confianza
         
-        elif data_type == SensitiveDataType.API_KEY:
-            # Alta confianza para patrones específicos de API keys
-            if text.startswith(('ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_')):
-                base_confidence = 0.98  # GitHub tokens
-            elif text.startswith('AIza'):
-                base_confidence = 0.98  # Google API keys
-            elif text.startswith('AKIA'):
-                base_confidence = 0.98  # AWS keys
-            elif len(text) >= 32:
-                base_confidence = 0.85  # Generic long keys
-            
-        elif data_type == SensitiveDataType.ACCESS_TOKEN:
-            # Alta confianza para tokens específicos
-            if text.startswith('pat-'):
-                base_confidence = 0.98  # HubSpot tokens
-            elif text.startswith('ntn_'):
-                base_confidence = 0.98  # Notion tokens
-            elif text.startswith('eyJ'):
-                base_confidence = 0.95  # JWT tokens
-            elif len(text) >= 40:
-                base_confidence = 0.85  # Generic long tokens
+        elif data_type in self._PREFIX_CONFIDENCE:
+            # Alta confianza para prefijos conocidos de API keys y tokens
+            prefixes = self._PREFIX_CONFIDENCE[data_type]
+            prefix_confidence = prefixes.get(text[:4]) or prefixes.get(text[:3])
+            if prefix_confidence:
+                base_confidence = prefix_confidence
+            elif len(text) >= self._GENERIC_TOKEN_MIN_LENGTH[data_type]:
+                # Las keys y tokens genéricos deben parecer aleatorios (alta entropía); se
+                # aplica a ambos tipos para que el token genérico no recoja lo descartado como key
+                if self._shannon_entropy(text) <= self._MIN_KEY_ENTROPY:
+                    base_confidence = 0.5  # Texto repetitivo, probablemente no es una key
+                else:
+                    base_confidence = 0.85  # Generic long keys/tokens
         
         return min(base_confidence, 1.0)
     
+    @staticmethod
+    def _shannon_entropy(text: str) -> float:
+        """Calcular la entropía de Shannon del texto en bits por carácter"""
+        length = len(text)
+        return -sum(
+            count / length * math.log2(count / length)
+            for count in Counter(text).values()
+        )
+    
     def _extract_context(self, text: str, start: int, end: int, context_size: int = 20) -> str:
         """Extraer contexto alrededor de la detección"""
         context_start = max(0, start - context_size)
         context_end = min(len(text), end + context_size)
         return text[context_start:context_end].strip()
     
-    def _resolve_overlaps(self, detections: List[Detection]) -> List[Detection]:
-        """Resolver superposiciones entre detecciones"""
-        if not detections:
-            return detections
+    def _resolve_overlaps(self, matches: Iterable[Tuple]) -> List[Tuple]:
+        """Resolver superposiciones entre coincidencias ordenadas por inicio"""
+        matches = iter(matches)
+        current = next(matches, None)
+        if current is None:
+            return []
         
         resolved = []
-        current = detections[0]
+        append = resolved.append
+        current_end, current_confidence = current[1], current[2]
         
-        for next_detection in detections[1:]:
+        # Barrido único sobre el flujo sin re-indexar la tupla actual
+        for next_match in matches:
             # Si no hay superposición, agregar el actual y continuar
-            if current.end_position <= next_detection.start_position:
-                resolved.append(current)
-                current = next_detection
-            else:
-                # Hay superposición - mantener el de mayor confianza
-                if next_detection.confidence > current.confidence:
-                    current = next_detection
+            if current_end <= next_match[0]:
+                append(current)
+                current = next_match
+                current_end, current_confidence = current[1], current[2]
+            # Hay superposición - mantener el de mayor confianza
+            elif next_match[2] > current_confidence:
+                current = next_match
+                current_end, current_confidence = current[1], current[2]
         
-        resolved.append(current)
+        append(current)
         return resolved
     
     def get_statistics(self, detections: List[Detection]) -> Dict[str, Any]:
@@ -252,12 +499,19 @@ class SensitiveDataDetector:
         
         if detections:
             # Contar por tipo
+            by_type = stats['by_type']
             for detection in detections:
                 type_name = detection.data_type.value
-                stats['by_type'][type_name] = stats['by_type'].get(type_name, 0) + 1
+                by_type[type_name] = by_type.get(type_name, 0) + 1
             
             # Calcular confianza promedio
             total_confidence = sum(d.confidence for d in detections)
             stats['average_confidence'] = total_confidence / len(detections)
         
-        return stats
\ No newline at end of file
+        return stats
+
+
+@lru_cache(maxsize=1)
+def get_default_detector() -> SensitiveDataDetector:
+    """Obtener el detector compartido (patrones compilados una vez por proceso)"""
+    return SensitiveDataDetector()
@@ -3,13 +3,32 @@ Módulo principal de procesamiento
 Coordina la detección, reemplazo y generación de archivos sanitizados
 """
 
+import hashlib
+import mmap
 import os
+import re
+import stat
+import string
+from collections import defaultdict
 from typing import List, Dict, Optional, Tuple, Any
 from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
 
-from .detector import SensitiveDataDetector, Detection
-from .security import SecurityManager, MappingEntry, RecoveryKey
+from .detector import SensitiveDataDetector, SensitiveDataType, Detection, get_default_detector
+from .recovery import RecoveryManager
+from .security import SecurityManager, MappingEntry, RecoveryKey, OUTPUT_BUFFER_SIZE
+
+
+def recovery_key_filename(sanitized_filename: str) -> str:
+    """Nombre de la llave de recuperación asociada a un archivo sanitizado"""
+    # Solo se separa la última extensión (los puntos del nombre se conservan)
+    name_part, dot, extension = sanitized_filename.rpartition('.')
+    if not dot:
+        return f"{sanitized_filename}_recovery_key.json"
+    if extension == 'json':
+        return f"{name_part}_recovery_key.json"
+    return f"{name_part}_recovery_key.{extension}.json"
 
 
 @dataclass
@@ -27,14 +46,32 @@ class ProcessingResult:
 class FileProcessor:
     """Procesador principal de archivos"""
     
+    # latin-1 acepta cualquier secuencia de bytes, así que nunca se pasa de ahí
+    # (cp1252 e iso-8859-1 detrás de ella eran inalcanzables)
+    _READ_ENCODINGS = ('utf-8', 'latin-1')
+    
+    # Compartido por todas las instancias (no se reconstruye en cada procesador)
+    _SUPPORTED_EXTENSIONS = frozenset({
+        '.txt', '.md', '.rst', '.py', '.js', '.java', '.cpp', '.c', '.h',
+        '.json', '.yaml', '.yml', '.xml', '.ini', '.conf', '.log', '.csv'
+    })
+    
+    # Tamaño máximo de archivo: en memoria y por ventanas (process_file_streaming)
+    _MAX_FILE_SIZE = 50 * 1024 * 1024
+    _STREAMING_MAX_FILE_SIZE = 10 * _MAX_FILE_SIZE
+    
+    # Ventana de lectura en caracteres (por debajo del umbral paralelo del detector)
+    # y margen final que se vuelve a analizar con la ventana siguiente
+    _STREAM_WINDOW_SIZE = 256 * 1024
+    _STREAM_OVERLAP = 4096
+    
+    # Caracteres de las keys y tokens genéricos (base64), que un corte de ventana no debe separar
+    _TOKEN_CHARS = frozenset(string.ascii_letters + string.digits + '+/=')
+    
     def __init__(self):
         """Inicializar procesador"""
-        self.detector = SensitiveDataDetector()
+        self.detector = get_default_detector()
         self.security_manager = SecurityManager()
-        self.supported_extensions = {
-            '.txt', '.md', '.rst', '.py', '.js', '.java', '.cpp', '.c', '.h',
-            '.json', '.yaml', '.yml', '.xml', '.ini', '.conf', '.log', '.csv'
-        }
     
     def process_file(self, file_path: str, 
                     output_dir: Optional[str] = None,
@@ -105,7 +142,7 @@ class FileProcessor:
             
             # Guardar archivos si se especifica directorio de salida
             if output_dir:
-                self._save_output_files(
+                self.save_output_files(
                     output_dir, sanitized_filename, sanitized_content, recovery_key
                 )
             
@@ -139,49 +176,218 @@ class FileProcessor:
                 sanitized_filename=""
             )
     
-    def recover_file(self, processed_file_path: str, 
-                    recovery_key_path: str,
-                    password: Optional[str] = None,
-                    output_path: Optional[str] = None) -> Tuple[bool, str, List[str]]:
-        """Recuperar archivo original usando llave de recuperación"""
-        
-        errors = []
+    def process_file_streaming(self, file_path: str,
+                               output_dir: str,
+                               password: Optional[str] = None) -> ProcessingResult:
+        """Procesar un archivo grande por ventanas, sin cargarlo completo en memoria"""
+        # El contenido sanitizado se escribe directamente en output_dir, por lo que
+        # el resultado no lo incluye (sanitized_content queda vacío)
+        original_filename = os.path.basename(file_path) if file_path else ""
         
         try:
-            # Cargar llave de recuperación
-            recovery_key = self.security_manager.load_recovery_key(recovery_key_path)
-            if not recovery_key:
-                return False, "", ["No se pudo cargar la llave de recuperación"]
+            # Validar archivo de entrada
+            if not self._validate_input_file(file_path, self._STREAMING_MAX_FILE_SIZE):
+                return ProcessingResult(
+                    success=False,
+                    sanitized_content="",
+                    recovery_key=None,
+                    statistics={},
+                    errors=[f"Archivo no válido o no soportado: {file_path}"],
+                    original_filename=original_filename,
+                    sanitized_filename=""
+                )
             
-            # Validar llave de recuperación
-            if not self.security_manager.validate_recovery_key(recovery_key):
-                return False, "", ["Llave de recuperación inválida"]
+            output_path = Path(output_dir)
+            output_path.mkdir(parents=True, exist_ok=True)
+            sanitized_filename = self.security_manager.generate_secure_filename(original_filename)
+            sanitized_path = output_path / sanitized_filename
             
-            # Leer archivo procesado
-            processed_content = self._read_file_content(processed_file_path)
-            if processed_content is None:
-                return False, "", ["No se pudo leer el archivo procesado"]
+            # Misma secuencia de encodings que _read_file_content; la última (latin-1)
+            # decodifica cualquier secuencia de bytes, así que no se protege
+            for encoding in self._READ_ENCODINGS[:-1]:
+                try:
+                    streamed = self._stream_sanitize(file_path, sanitized_path, encoding)
+                    break
+                except UnicodeDecodeError:
+                    sanitized_path.unlink(missing_ok=True)  # Salida parcial del intento fallido
+                    continue
+            else:
+                streamed = self._stream_sanitize(file_path, sanitized_path, self._READ_ENCODINGS[-1])
+            detections, mappings, file_hash, sizes = streamed
             
-            # Recuperar contenido original
-            recovered_content = self.security_manager.recover_original_data(
-                processed_content, recovery_key, password
-            )
+            if not detections:
+                # Igual que process_file: sin detecciones no se generan archivos
+                # (la salida nunca llegó a abrirse)
+                return ProcessingResult(
+                    success=True,
+                    sanitized_content="",
+                    recovery_key=None,
+                    statistics={"total_detections": 0, "message": "No se encontraron datos sensibles"},
+                    errors=[],
+                    original_filename=original_filename,
+                    sanitized_filename=""
+                )
             
-            if recovered_content is None:
-                return False, "", ["Error durante la recuperación de datos"]
+            # Generar y guardar llave de recuperación (el hash se calculó al leer)
+            recovery_key = self.security_manager.generate_recovery_key(
+                mappings, "", password, file_hash=file_hash
+            )
+            recovery_path = output_path / recovery_key_filename(sanitized_filename)
+            self.security_manager.save_recovery_key(recovery_key, str(recovery_path))
             
-            # Guardar archivo recuperado si se especifica ruta
-            if output_path:
-                try:
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        f.write(recovered_content)
-                except Exception as e:
-                    errors.append(f"Error guardando archivo recuperado: {e}")
+            # Generar estadísticas
+            statistics = self.detector.get_statistics(detections)
+            statistics.update({
+                'mappings_created': len(mappings),
+                'file_size_original': sizes[0],
+                'file_size_sanitized': sizes[1],
+                'recovery_key_generated': True,
+                'streaming': True
+            })
             
-            return True, recovered_content, errors
+            return ProcessingResult(
+                success=True,
+                sanitized_content="",
+                recovery_key=recovery_key,
+                statistics=statistics,
+                errors=[],
+                original_filename=original_filename,
+                sanitized_filename=sanitized_filename
+            )
             
         except Exception as e:
-            return False, "", [f"Error durante la recuperación: {str(e)}"]
+            return ProcessingResult(
+                success=False,
+                sanitized_content="",
+                recovery_key=None,
+                statistics={},
+                errors=[f"Error durante el procesamiento: {str(e)}"],
+                original_filename=original_filename,
+                sanitized_filename=""
+            )
+    
+    def _stream_sanitize(self, file_path: str, sanitized_path: Path,
+                         encoding: str) -> Tuple[List[Detection], List[MappingEntry], str, Tuple[int, int]]:
+        """Detectar y reemplazar ventana a ventana, escribiendo la salida sobre la marcha"""
+        # Hash del texto decodificado, igual que el de process_file
+        digest = hashlib.sha256()
+        detections = []
+        mappings = []
+        dummy_counters = defaultdict(int)  # Numeración de dummies continua entre ventanas
+        original_size = sanitized_size = 0
+        offset = 0  # Posición global del inicio del buffer
+        buffer = ""
+        target = None  # La salida solo se abre al aparecer la primera detección
+        
+        try:
+            with open(file_path, 'r', encoding=encoding) as source:
+                while True:
+                    chunk = source.read(self._STREAM_WINDOW_SIZE)
+                    at_eof = not chunk
+                    if chunk:
+                        digest.update(chunk.encode('utf-8'))
+                        original_size += len(chunk)
+                        buffer += chunk
+                    
+                    # Solo se confirma el texto anterior al margen final, cortando en un
+                    # salto de línea (o al menos fuera de una racha de caracteres de
+                    # token) para no partir coincidencias que siguen más adelante
+                    if at_eof:
+                        cut = len(buffer)
+                    else:
+                        limit = len(buffer) - self._STREAM_OVERLAP
+                        if limit <= 0:
+                            continue
+                        cut = buffer.rfind('\n', 0, limit) + 1 or self._token_boundary(buffer, limit)
+                        if not cut:
+                            continue  # Una sola racha hasta el margen: leer más antes de cortar
+                    
+                    window_detections = []
+                    for detection in self.detector.detect_all(buffer):
+                        if detection.end_position <= cut:
+                            window_detections.append(detection)
+                        else:
+                            # Una coincidencia que cruza el corte pasa entera a la ventana siguiente
+                            if detection.start_position < cut:
+                                cut = detection.start_position
+                            break
+                    
+                    window_mappings = self.security_manager.create_dummy_replacements(
+                        window_detections, dummy_counters
+                    )
+                    sanitized = self._apply_replacements(buffer[:cut], window_mappings)
+                    sanitized_size += len(sanitized)
+                    
+                    if window_mappings and target is None:
+                        # El texto anterior salió sin cambios: se copia desde el origen
+                        target = open(sanitized_path, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE)
+                        self._copy_text_prefix(file_path, encoding, offset, target)
+                    if target is not None:
+                        target.write(sanitized)
+                    
+                    # Pasar las posiciones de la ventana a posiciones del archivo
+                    for detection, mapping in zip(window_detections, window_mappings):
+                        detection.start_position += offset
+                        detection.end_position += offset
+                        mapping.position = (detection.start_position, detection.end_position)
+                    detections.extend(window_detections)
+                    mappings.extend(window_mappings)
+                    
+                    buffer = buffer[cut:]
+                    offset += cut
+                    if at_eof:
+                        break
+        finally:
+            if target is not None:
+                target.close()
+        
+        return detections, mappings, digest.hexdigest(), (original_size, sanitized_size)
+    
+    def _token_boundary(self, buffer: str, limit: int) -> int:
+        """Último corte hasta limit que no parte una racha de caracteres de key/token
+        
+        Devuelve 0 si todo el buffer hasta limit es una única racha (hay que leer más),
+        salvo que el buffer ya ocupe varias ventanas: entonces se corta en limit.
+        """
+        # Partir una racha haría que su cola empezara la ventana siguiente y pareciera
+        # una key o token genérico completo
+        for cut in range(limit, 0, -1):
+            if buffer[cut - 1] not in self._TOKEN_CHARS:
+                return cut
+        return limit if len(buffer) > 4 * self._STREAM_WINDOW_SIZE else 0
+    
+    def _copy_text_prefix(self, file_path: str, encoding: str, length: int, target):
+        """Copiar los primeros length caracteres (ya decodificados) de un archivo"""
+        with open(file_path, 'r', encoding=encoding) as source:
+            while length > 0:
+                chunk = source.read(min(length, self._STREAM_WINDOW_SIZE))
+                if not chunk:
+                    break
+                target.write(chunk)
+                length -= len(chunk)
+    
+    def recover_file(self, processed_file_path: str, 
+                    recovery_key_path: str,
+                    password: Optional[str] = None,
+                    output_path: Optional[str] = None) -> Tuple[bool, str, List[str]]:
+        """Recuperar archivo original usando llave de recuperación"""
+        # Un único camino de recuperación: el de RecoveryManager (lectura,
+        # validación cacheada de la llave, integridad y escritura)
+        result = self.recovery_manager.recover_from_key_file(
+            processed_file_path, recovery_key_path, password, output_path
+        )
+        
+        if not result["success"]:
+            return False, "", result["errors"]
+        
+        return True, result["recovered_content"], result["warnings"]
+    
+    @cached_property
+    def recovery_manager(self) -> RecoveryManager:
+        """Gestor de recuperación, creado solo cuando se usa por primera vez"""
+        manager = RecoveryManager()
+        manager.security_manager = self.security_manager
+        return manager
     
     def preview_changes(self, file_path: str, 
                        custom_patterns: Optional[Dict] = None) -> Tuple[List[Detection], Dict[str, Any]]:
@@ -212,90 +418,105 @@ class FileProcessor:
         except Exception as e:
             return [], {"error": f"Error en preview: {str(e)}"}
     
-    def _validate_input_file(self, file_path: str) -> bool:
+    def _validate_input_file(self, file_path: str, max_size: Optional[int] = None) -> bool:
         """Validar que el archivo de entrada es procesable"""
+        # Una sola llamada a stat cubre existencia, tipo y tamaño
         try:
-            path_obj = Path(file_path)
-            
-            # Verificar que existe
-            if not path_obj.exists():
-                return False
-            
-            # Verificar que es un archivo
-            if not path_obj.is_file():
-                return False
-            
-            # Verificar extensión soportada
-            if path_obj.suffix.lower() not in self.supported_extensions:
-                return False
-            
-            # Verificar tamaño (máximo 50MB)
-            if path_obj.stat().st_size > 50 * 1024 * 1024:
-                return False
-            
-            return True
-            
-        except Exception:
+            file_stat = os.stat(file_path)
+        except (OSError, TypeError, ValueError):
+            return False
+        
+        # Verificar que es un archivo regular
+        if not stat.S_ISREG(file_stat.st_mode):
             return False
+        
+        # Verificar tamaño (máximo 50MB salvo que se indique otro límite)
+        if file_stat.st_size > (max_size or self._MAX_FILE_SIZE):
+            return False
+        
+        # Verificar extensión soportada
+        return self.is_file_supported(file_path)
     
     def _read_file_content(self, file_path: str) -> Optional[str]:
         """Leer contenido de archivo con manejo de encoding"""
-        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+        try:
+            with open(file_path, 'rb') as f:
+                # Mapear el archivo una sola vez y decodificar directamente desde el buffer
+                try:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    return ""  # Archivo vacío: no se puede mapear
+                
+                with mapped:
+                    for encoding in self._READ_ENCODINGS:
+                        try:
+                            content = str(mapped, encoding)
+                            break
+                        except UnicodeDecodeError:
+                            continue
+                    else:
+                        return None
+        except Exception:
+            return None
         
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
-            except UnicodeDecodeError:
-                continue
-            except Exception:
-                break
+        # Mismo resultado que el modo texto (saltos de línea universales)
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
         
-        return None
+        return content
     
     def _apply_replacements(self, content: str, mappings: List[MappingEntry]) -> str:
-        """Aplicar reemplazos de datos sensibles"""
-        # Ordenar por posición (de final a inicio para evitar problemas de índices)
-        sorted_mappings = sorted(mappings, key=lambda x: x.position[0], reverse=True)
-        
-        result = content
-        for mapping in sorted_mappings:
+        """Aplicar reemplazos de datos sensibles (mapeos ordenados por posición)"""
+        # Barrido único de inicio a fin: detect_all ya entrega las detecciones
+        # ordenadas y sin superposición, y create_dummy_replacements conserva ese orden
+        parts = []
+        previous_end = 0
+        for mapping in mappings:
             start, end = mapping.position
-            # Reemplazar usando posiciones exactas
-            result = result[:start] + mapping.dummy + result[end:]
+            parts.append(content[previous_end:start])
+            parts.append(mapping.dummy)
+            previous_end = end
+        parts.append(content[previous_end:])
         
-        return result
+        return "".join(parts)
     
     def _update_detector_patterns(self, custom_patterns: Dict):
         """Actualizar patrones del detector con patrones personalizados"""
         # Esta implementación es básica - en el futuro se puede expandir
-        for data_type, patterns in custom_patterns.items():
-            if hasattr(self.detector.patterns, data_type):
-                self.detector.patterns[data_type].extend(patterns)
+        for type_name, patterns in custom_patterns.items():
+            try:
+                data_type = SensitiveDataType(type_name)
+            except ValueError:
+                continue  # Tipo desconocido: se ignora
+            
+            # No modificar el detector compartido por otros procesadores
+            if self.detector is get_default_detector():
+                self.detector = SensitiveDataDetector()
+            self.detector.add_patterns(data_type, patterns, re.IGNORECASE)
     
-    def _save_output_files(self, output_dir: str, sanitized_filename: str, 
-                          sanitized_content: str, recovery_key: RecoveryKey):
-        """Guardar archivos de salida"""
+    def save_output_files(self, output_dir: str, sanitized_filename: str, 
+                          sanitized_content: str, recovery_key: Optional[RecoveryKey]) -> bool:
+        """Guardar archivos de salida; devuelve si se guardó la llave de recuperación"""
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        # Guardar archivo sanitizado
-        sanitized_path = output_path / sanitized_filename
-        with open(sanitized_path, 'w', encoding='utf-8') as f:
-            f.write(sanitized_content)
+        self._write_text(output_path / sanitized_filename, sanitized_content)
         
-        # Guardar llave de recuperación
-        recovery_filename = sanitized_filename.replace('.', '_recovery_key.')
-        if not recovery_filename.endswith('.json'):
-            recovery_filename += '.json'
+        if recovery_key is None:
+            return False
         
-        recovery_path = output_path / recovery_filename
-        self.security_manager.save_recovery_key(recovery_key, str(recovery_path))
+        recovery_path = output_path / recovery_key_filename(sanitized_filename)
+        return self.security_manager.save_recovery_key(recovery_key, str(recovery_path))
+    
+    def _write_text(self, file_path: Path, content: str):
+        """Escribir texto UTF-8 con buffer grande"""
+        with open(file_path, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
+            f.write(content)
     
     def get_supported_extensions(self) -> List[str]:
         """Obtener lista de extensiones soportadas"""
-        return list(self.supported_extensions)
+        return list(self._SUPPORTED_EXTENSIONS)
     
     def is_file_supported(self, file_path: str) -> bool:
         """Verificar si un archivo es soportado"""
-        return Path(file_path).suffix.lower() in self.supported_extensions
\ No newline at end of file
+        return os.path.splitext(file_path)[1].lower() in self._SUPPORTED_EXTENSIONS
\ No newline at end of file
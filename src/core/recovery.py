@@ -3,13 +3,16 @@ Módulo de recuperación de datos
 Maneja la restauración de datos originales y validación de integridad
 """
 
-import json
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
 from datetime import datetime
+from functools import cached_property
 
-from .security import SecurityManager, RecoveryKey
+from .security import SecurityManager, RecoveryKey, dump_json, OUTPUT_BUFFER_SIZE
 
 
 class RecoveryManager:
@@ -17,14 +20,32 @@ class RecoveryManager:
     
     def __init__(self):
         """Inicializar gestor de recuperación"""
-        self.security_manager = SecurityManager()
-        self.recovery_history = []
+        self.recovery_history = deque(maxlen=100)  # Solo las últimas 100 entradas
+        self._validated_keys = {}  # (ruta, mtime_ns, tamaño) -> RecoveryKey ya validada
+        # (procesado, mtime_ns, tamaño, llave, mtime_ns, tamaño) -> verificación de integridad
+        self._integrity_checks = {}
+    
+    @cached_property
+    def security_manager(self) -> SecurityManager:
+        """Gestor de seguridad, creado solo cuando se usa por primera vez"""
+        return SecurityManager()
+    
+    def clear_cached_keys(self):
+        """Olvidar las claves derivadas de contraseñas (si ya se derivó alguna)"""
+        if 'security_manager' in self.__dict__:  # No crear el gestor solo para vaciarlo
+            self.security_manager.clear_kdf_cache()
     
     def recover_from_key_file(self, processed_file_path: str, 
                              recovery_key_path: str,
                              password: Optional[str] = None,
-                             output_path: Optional[str] = None) -> Dict[str, Any]:
-        """Recuperar archivo desde archivo de llave de recuperación"""
+                             output_path: Optional[str] = None,
+                             create_output_dir: bool = True,
+                             preview_chars: Optional[int] = None) -> Dict[str, Any]:
+        """Recuperar archivo desde archivo de llave de recuperación
+        
+        Con preview_chars el resultado no incluye el contenido completo, solo sus
+        primeros caracteres en "preview" (el archivo se escribe igualmente en output_path).
+        """
         
         result = {
             "success": False,
@@ -44,14 +65,13 @@ class RecoveryManager:
                 result["errors"].append("Archivo de llave de recuperación no encontrado")
                 return result
             
-            # Cargar llave de recuperación
-            recovery_key = self.security_manager.load_recovery_key(recovery_key_path)
+            # Cargar y validar llave de recuperación
+            recovery_key, key_valid = self._load_validated_key(recovery_key_path)
             if not recovery_key:
                 result["errors"].append("No se pudo cargar la llave de recuperación")
                 return result
             
-            # Validar llave de recuperación
-            if not self.security_manager.validate_recovery_key(recovery_key):
+            if not key_valid:
                 result["errors"].append("Llave de recuperación inválida o corrupta")
                 return result
             
@@ -59,12 +79,15 @@ class RecoveryManager:
             try:
                 with open(processed_file_path, 'r', encoding='utf-8') as f:
                     processed_content = f.read()
+                    processed_stat = os.fstat(f.fileno())
             except Exception as e:
                 result["errors"].append(f"Error leyendo archivo procesado: {e}")
                 return result
             
-            # Verificar integridad básica
-            integrity_check = self._perform_integrity_check(processed_content, recovery_key)
+            # Verificar integridad básica (sin repetirla si una validación ya la hizo)
+            integrity_check = self._checked_integrity(
+                processed_content, recovery_key, processed_file_path, processed_stat, recovery_key_path
+            )
             if not integrity_check["valid"]:
                 result["warnings"].extend(integrity_check["warnings"])
             
@@ -80,8 +103,10 @@ class RecoveryManager:
             # Guardar archivo recuperado si se especifica ruta
             if output_path:
                 try:
-                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                    with open(output_path, 'w', encoding='utf-8') as f:
+                    output_parent = os.path.dirname(output_path)
+                    if create_output_dir and output_parent:
+                        os.makedirs(output_parent, exist_ok=True)
+                    with open(output_path, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
                         f.write(recovered_content)
                     result["output_path"] = output_path
                 except Exception as e:
@@ -91,9 +116,11 @@ class RecoveryManager:
             self._add_to_recovery_history(recovery_key_path, processed_file_path, True)
             
             # Preparar resultado exitoso
+            if preview_chars is not None:
+                result["preview"] = recovered_content[:preview_chars]
             result.update({
                 "success": True,
-                "recovered_content": recovered_content,
+                "recovered_content": recovered_content if preview_chars is None else "",
                 "metadata": {
                     "original_file_hash": recovery_key.file_hash,
                     "recovery_timestamp": recovery_key.timestamp,
@@ -122,59 +149,100 @@ class RecoveryManager:
             "overall_errors": []
         }
         
-        for i, request in enumerate(recovery_requests):
+        # Todas las salidas del lote van al mismo directorio: crearlo una sola vez
+        if output_dir:
             try:
-                processed_file = request.get("processed_file")
-                recovery_key_file = request.get("recovery_key")
-                
-                if not processed_file or not recovery_key_file:
-                    results["file_results"].append({
-                        "index": i,
-                        "success": False,
-                        "error": "Archivos requeridos no especificados"
-                    })
-                    results["failed_recoveries"] += 1
-                    continue
-                
-                # Determinar archivo de salida
-                output_path = None
-                if output_dir:
-                    filename = os.path.basename(processed_file)
-                    # Remover sufijos de sanitización si existen
-                    if "_sanitized_" in filename:
-                        filename = filename.split("_sanitized_")[0] + ".txt"
-                    output_path = os.path.join(output_dir, f"recovered_{filename}")
-                
-                # Realizar recuperación
-                recovery_result = self.recover_from_key_file(
-                    processed_file, recovery_key_file, password, output_path
-                )
-                
-                if recovery_result["success"]:
-                    results["successful_recoveries"] += 1
-                else:
-                    results["failed_recoveries"] += 1
-                
-                results["file_results"].append({
-                    "index": i,
-                    "processed_file": processed_file,
-                    "recovery_key": recovery_key_file,
-                    "success": recovery_result["success"],
-                    "errors": recovery_result["errors"],
-                    "warnings": recovery_result["warnings"],
-                    "output_path": output_path if recovery_result["success"] else None
-                })
-                
-            except Exception as e:
-                results["file_results"].append({
-                    "index": i,
-                    "success": False,
-                    "error": f"Error procesando archivo {i}: {str(e)}"
-                })
+                os.makedirs(output_dir, exist_ok=True)
+            except OSError as e:
+                results["overall_errors"].append(f"No se pudo crear el directorio de salida: {e}")
+        
+        file_results = self._run_batch(recovery_requests, password, output_dir)
+        
+        for file_result in file_results:
+            if file_result["success"]:
+                results["successful_recoveries"] += 1
+            else:
                 results["failed_recoveries"] += 1
+            results["file_results"].append(file_result)
         
         return results
     
+    def _run_batch(self, recovery_requests: List[Dict[str, str]],
+                   password: Optional[str],
+                   output_dir: Optional[str]) -> List[Dict[str, Any]]:
+        """Ejecutar las recuperaciones del lote, en paralelo si hay varios núcleos"""
+        max_workers = min(len(recovery_requests), os.cpu_count() or 1)
+        
+        if max_workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [
+                        executor.submit(_recover_request_worker, i, request, password, output_dir)
+                        for i, request in enumerate(recovery_requests)
+                    ]
+                    # Resultados en el orden original de las solicitudes
+                    outcomes = [future.result() for future in futures]
+                
+                file_results = []
+                for file_result, history in outcomes:
+                    self._extend_recovery_history(history)
+                    file_results.append(file_result)
+                return file_results
+            except (OSError, BrokenProcessPool):
+                pass  # Sin soporte de multiprocessing: continuar en modo secuencial
+        
+        return [
+            self._recover_request(i, request, password, output_dir)
+            for i, request in enumerate(recovery_requests)
+        ]
+    
+    def _recover_request(self, i: int, request: Dict[str, str],
+                         password: Optional[str],
+                         output_dir: Optional[str]) -> Dict[str, Any]:
+        """Recuperar un archivo del lote y devolver su resultado"""
+        try:
+            processed_file = request.get("processed_file")
+            recovery_key_file = request.get("recovery_key")
+            
+            if not processed_file or not recovery_key_file:
+                return {
+                    "index": i,
+                    "success": False,
+                    "error": "Archivos requeridos no especificados"
+                }
+            
+            # Determinar archivo de salida
+            output_path = None
+            if output_dir:
+                filename = os.path.basename(processed_file)
+                # Remover sufijos de sanitización si existen
+                if "_sanitized_" in filename:
+                    filename = filename.split("_sanitized_")[0] + ".txt"
+                output_path = os.path.join(output_dir, f"recovered_{filename}")
+            
+            # Realizar recuperación
+            recovery_result = self.recover_from_key_file(
+                processed_file, recovery_key_file, password, output_path,
+                create_output_dir=False
+            )
+            
+            return {
+                "index": i,
+                "processed_file": processed_file,
+                "recovery_key": recovery_key_file,
+                "success": recovery_result["success"],
+                "errors": recovery_result["errors"],
+                "warnings": recovery_result["warnings"],
+                "output_path": output_path if recovery_result["success"] else None
+            }
+            
+        except Exception as e:
+            return {
+                "index": i,
+                "success": False,
+                "error": f"Error procesando archivo {i}: {str(e)}"
+            }
+    
     def validate_recovery_compatibility(self, processed_file_path: str,
                                       recovery_key_path: str) -> Dict[str, Any]:
         """Validar compatibilidad entre archivo procesado y llave de recuperación"""
@@ -187,14 +255,13 @@ class RecoveryManager:
         }
         
         try:
-            # Cargar llave de recuperación
-            recovery_key = self.security_manager.load_recovery_key(recovery_key_path)
+            # Cargar y validar estructura de la llave
+            recovery_key, key_valid = self._load_validated_key(recovery_key_path)
             if not recovery_key:
                 validation["issues"].append("No se pudo cargar la llave de recuperación")
                 return validation
             
-            # Validar estructura de la llave
-            if not self.security_manager.validate_recovery_key(recovery_key):
+            if not key_valid:
                 validation["issues"].append("Llave de recuperación inválida")
                 return validation
             
@@ -207,6 +274,7 @@ class RecoveryManager:
             try:
                 with open(processed_file_path, 'r', encoding='utf-8') as f:
                     processed_content = f.read()
+                    processed_stat = os.fstat(f.fileno())
             except Exception as e:
                 validation["issues"].append(f"Error leyendo archivo procesado: {e}")
                 return validation
@@ -219,7 +287,9 @@ class RecoveryManager:
                 )
             
             # Verificar integridad
-            integrity_check = self._perform_integrity_check(processed_content, recovery_key)
+            integrity_check = self._checked_integrity(
+                processed_content, recovery_key, processed_file_path, processed_stat, recovery_key_path
+            )
             validation["warnings"].extend(integrity_check["warnings"])
             
             # Si llegamos aquí sin errores críticos, es compatible
@@ -236,6 +306,57 @@ class RecoveryManager:
         
         return validation
     
+    def _load_validated_key(self, recovery_key_path: str) -> Tuple[Optional[RecoveryKey], bool]:
+        """Cargar y validar una llave, reutilizando el resultado si el archivo no cambió"""
+        try:
+            st = os.stat(recovery_key_path)
+            cache_key = (recovery_key_path, st.st_mtime_ns, st.st_size)
+        except OSError:
+            cache_key = None
+        
+        cached = self._validated_keys.get(cache_key)
+        if cached is not None:
+            return cached, True
+        
+        recovery_key = self.security_manager.load_recovery_key(recovery_key_path)
+        if not recovery_key:
+            return None, False
+        
+        if not self.security_manager.validate_recovery_key(recovery_key):
+            return recovery_key, False
+        
+        if cache_key is not None:
+            # Cualquier escritura cambia mtime/tamaño, invalidando la entrada anterior
+            if len(self._validated_keys) >= 128:
+                self._validated_keys.clear()
+            self._validated_keys[cache_key] = recovery_key
+        
+        return recovery_key, True
+    
+    def _checked_integrity(self, content: str, recovery_key: RecoveryKey,
+                           processed_file_path: str, processed_stat: os.stat_result,
+                           recovery_key_path: str) -> Dict[str, Any]:
+        """Verificación de integridad, reutilizada si los mismos archivos no cambiaron"""
+        try:
+            key_stat = os.stat(recovery_key_path)
+            cache_key = (
+                processed_file_path, processed_stat.st_mtime_ns, processed_stat.st_size,
+                recovery_key_path, key_stat.st_mtime_ns, key_stat.st_size
+            )
+        except OSError:
+            cache_key = None
+        
+        cached = self._integrity_checks.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        integrity_check = self._perform_integrity_check(content, recovery_key)
+        if cache_key is not None:
+            if len(self._integrity_checks) >= 128:
+                self._integrity_checks.clear()
+            self._integrity_checks[cache_key] = integrity_check
+        return integrity_check
+    
     def _perform_integrity_check(self, content: str, recovery_key: RecoveryKey) -> Dict[str, Any]:
         """Realizar verificación de integridad básica"""
         
@@ -245,8 +366,8 @@ class RecoveryManager:
         }
         
         try:
-            # Verificar que el contenido no esté vacío
-            if not content.strip():
+            # Verificar que el contenido no esté vacío (isspace evita copiar el texto como strip)
+            if not content or content.isspace():
                 check_result["warnings"].append("El archivo procesado está vacío")
                 check_result["valid"] = False
             
@@ -282,14 +403,14 @@ class RecoveryManager:
         }
         
         self.recovery_history.append(entry)
-        
-        # Mantener solo las últimas 100 entradas
-        if len(self.recovery_history) > 100:
-            self.recovery_history = self.recovery_history[-100:]
+    
+    def _extend_recovery_history(self, entries: List[Dict[str, Any]]):
+        """Incorporar entradas ya creadas (p. ej. por procesos del lote) al historial"""
+        self.recovery_history.extend(entries)
     
     def get_recovery_history(self) -> List[Dict[str, Any]]:
         """Obtener historial de recuperaciones"""
-        return self.recovery_history.copy()
+        return list(self.recovery_history)
     
     def export_recovery_report(self, file_path: str) -> bool:
         """Exportar reporte de recuperaciones a archivo"""
@@ -299,12 +420,20 @@ class RecoveryManager:
                 "total_recoveries": len(self.recovery_history),
                 "successful_recoveries": sum(1 for entry in self.recovery_history if entry["success"]),
                 "failed_recoveries": sum(1 for entry in self.recovery_history if not entry["success"]),
-                "history": self.recovery_history
+                "history": list(self.recovery_history)
             }
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=2, ensure_ascii=False)
+            dump_json(report, file_path)
             
             return True
         except Exception:
-            return False
\ No newline at end of file
+            return False
+
+
+def _recover_request_worker(i: int, request: Dict[str, str],
+                            password: Optional[str],
+                            output_dir: Optional[str]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Recuperar un archivo del lote en un proceso del pool"""
+    manager = RecoveryManager()
+    file_result = manager._recover_request(i, request, password, output_dir)
+    return file_result, manager.get_recovery_history()
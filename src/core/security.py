@@ -4,18 +4,60 @@ Maneja la generación de llaves, encriptación de mapeos y recuperación de dato
 """
 
 import json
+import os
+import sys
+import threading
+import time
 import hashlib
 import secrets
 import base64
+import re
+from collections import OrderedDict, defaultdict
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
 
-@dataclass
+try:
+    from rfernet import Fernet as RustFernet
+except ImportError:  # rfernet (Fernet compilado en Rust) es opcional
+    RustFernet = None
+
+try:
+    from fastpbkdf2 import pbkdf2_hmac as fast_pbkdf2_hmac
+except ImportError:  # fastpbkdf2 (HMAC con estados precalculados) es opcional
+    fast_pbkdf2_hmac = None
+
+# Todo token Fernet empieza así (byte de versión 0x80 en base64 urlsafe)
+FERNET_TOKEN_PREFIX = b'gAAAAA'
+
+# Buffer de escritura para archivos de salida (menos syscalls en archivos grandes)
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+
+def dump_json(data: Any, filepath: str):
+    """Escribir JSON indentado en UTF-8 (con orjson si está disponible)"""
+    if orjson is not None:
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+# slots=True solo existe desde Python 3.10; en versiones anteriores se omite
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class MappingEntry:
     """Entrada de mapeo entre dato original y dummy"""
     original: str
@@ -24,9 +66,20 @@ class MappingEntry:
     position: tuple
     context: str
     confidence: float
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convertir a diccionario serializable (sin la copia profunda de asdict)"""
+        return {
+            'original': self.original,
+            'dummy': self.dummy,
+            'data_type': self.data_type,
+            'position': self.position,
+            'context': self.context,
+            'confidence': self.confidence
+        }
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class RecoveryKey:
     """Llave de recuperación con metadatos"""
     file_hash: str
@@ -36,42 +89,115 @@ class RecoveryKey:
     salt: str
     checksum: str
     encryption_key: Optional[str] = None  # Clave de encriptación (solo cuando no hay password)
+    nonce: Optional[str] = None  # Nonce AES-GCM (las llaves sin nonce usan Fernet)
+    kdf_algorithm: Optional[str] = None  # Hash de PBKDF2 (None: sha256 de llaves antiguas)
+    iterations: Optional[int] = None  # Iteraciones de PBKDF2 (None: 100000 de llaves antiguas)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convertir la llave a diccionario para guardarla como JSON"""
+        return {
+            'file_hash': self.file_hash,
+            'mapping_data': self.mapping_data,
+            'timestamp': self.timestamp,
+            'version': self.version,
+            'salt': self.salt,
+            'checksum': self.checksum,
+            'encryption_key': self.encryption_key,
+            'nonce': self.nonce,
+            'kdf_algorithm': self.kdf_algorithm,
+            'iterations': self.iterations
+        }
 
 
 class SecurityManager:
     """Gestor de seguridad para encriptación y recuperación"""
     
+    # Plantillas de texto dummy por tipo de dato ({0} es el contador)
+    _DUMMY_TEMPLATES = {
+        'email': 'user{0:03d}@example.com',
+        'phone': '+1-555-{0:04d}',
+        'ip_address': '192.168.1.{0}',
+        'file_path': '/home/user{0}/document{0}.txt',
+        'url': 'https://example{0}.com/path',
+        'person_name': 'Person{0:03d}',
+        'credit_card': '4000-0000-0000-{0:04d}',
+        'date': '2024-01-{0:02d}',
+        'address': '{0} Example Street, City{0}',
+        'api_key': 'DUMMY_API_KEY_{0:06d}_' + 'a' * 32,
+        'access_token': 'DUMMY_ACCESS_TOKEN_{0:06d}_' + 'b' * 40
+    }
+    
+    # Tipos cuyo contador es cíclico para seguir siendo válidos (octeto IP, día del mes)
+    _DUMMY_CYCLES = {'ip_address': 254, 'date': 28}
+    
+    # Alfabetos base64 estándar y urlsafe (tokens Fernet), con relleno final
+    _BASE64_RE = re.compile(r'[A-Za-z0-9+/]*={0,2}')
+    _BASE64_URLSAFE_RE = re.compile(r'[A-Za-z0-9_-]*={0,2}')
+    
+    # Hashes admitidos para PBKDF2; el usado queda registrado en cada llave
+    _KDF_ALGORITHMS = {'sha256': hashes.SHA256, 'sha512': hashes.SHA512}
+    
+    # Calibración de iteraciones: tiempo objetivo por derivación y límites admitidos
+    _KDF_TARGET_SECONDS = 0.25
+    _KDF_CALIBRATION_ITERATIONS = 10000
+    _KDF_MAX_ITERATIONS = 10000000
+    _KDF_CONFIG_PATH = os.path.join(os.path.expanduser('~'), '.data_sanitizer', 'kdf.json')
+    _calibrated_iterations: Dict[str, int] = {}  # Compartida por todas las instancias del proceso (0: sin calibración)
+    
     def __init__(self):
         """Inicializar gestor de seguridad"""
-        self.version = "1.0.0"
-        self.key_derivation_iterations = 100000
+        self.version = "1.1.0"
+        self.key_derivation_iterations = 100000  # Mínimo para llaves nuevas y valor de las antiguas
+        self.kdf_algorithm = 'sha256'  # Con extensiones SHA de la CPU es más rápido que sha512
+        self._kdf_cache = OrderedDict()  # Huella de (contraseña, salt, parámetros) -> clave derivada
+        
+        # Reserva de bytes aleatorios para salts, nonces y nombres (no para claves)
+        self._random_pool = b''
+        self._random_pid = os.getpid()
+        self._random_lock = threading.Lock()
     
     def generate_recovery_key(self, mapping_data: List[MappingEntry], 
                             original_file_content: str, 
-                            password: Optional[str] = None) -> RecoveryKey:
-        """Generar llave de recuperación encriptada"""
+                            password: Optional[str] = None,
+                            file_hash: Optional[str] = None) -> RecoveryKey:
+        """Generar llave de recuperación encriptada
+        
+        file_hash es el hash del contenido ya calculado al leerlo (lectura por ventanas);
+        sin él se calcula a partir de original_file_content.
+        """
         
         # Generar hash del archivo original
-        file_hash = self._generate_file_hash(original_file_content)
+        if file_hash is None:
+            file_hash = self._generate_file_hash(original_file_content)
         
         # Convertir mapeos a formato serializable
-        serializable_mappings = [asdict(mapping) for mapping in mapping_data]
-        mapping_json = json.dumps(serializable_mappings, ensure_ascii=False, indent=2)
+        serializable_mappings = [mapping.to_dict() for mapping in mapping_data]
+        # JSON compacto: el contenido va encriptado y nadie lo lee, sin sangría
+        if orjson is not None:
+            mapping_json = orjson.dumps(serializable_mappings)
+        else:
+            mapping_json = json.dumps(
+                serializable_mappings, ensure_ascii=False, separators=(',', ':')
+            ).encode('utf-8')
         
-        # Generar salt único
-        salt = secrets.token_bytes(32)
+        # Generar salt y nonce únicos
+        salt = self._random_bytes(32)
+        nonce = self._random_bytes(12)
         
-        # Generar clave de encriptación
+        # Generar clave de encriptación (32 bytes para AES-256)
         stored_key = None
+        iterations = None
         if password:
-            encryption_key = self._derive_key_from_password(password, salt)
+            iterations = self.get_kdf_iterations(self.kdf_algorithm)
+            encryption_key = self._derive_raw_key(password, salt, self.kdf_algorithm, iterations)
         else:
-            encryption_key = Fernet.generate_key()
+            encryption_key = AESGCM.generate_key(bit_length=256)
             stored_key = base64.b64encode(encryption_key).decode('utf-8')
         
-        # Encriptar datos de mapeo
-        fernet = Fernet(encryption_key)
-        encrypted_mapping = fernet.encrypt(mapping_json.encode('utf-8'))
+        # Encriptar datos de mapeo; el hash del archivo queda autenticado como dato asociado
+        encrypted_mapping = AESGCM(encryption_key).encrypt(
+            nonce, mapping_json, file_hash.encode('utf-8')
+        )
         
         # Generar checksum de integridad
         checksum = self._generate_checksum(mapping_json, file_hash)
@@ -84,7 +210,10 @@ class SecurityManager:
             version=self.version,
             salt=base64.b64encode(salt).decode('utf-8'),
             checksum=checksum,
-            encryption_key=stored_key
+            encryption_key=stored_key,
+            nonce=base64.b64encode(nonce).decode('utf-8'),
+            kdf_algorithm=self.kdf_algorithm if password else None,
+            iterations=iterations
         )
         
         return recovery_key
@@ -92,9 +221,7 @@ class SecurityManager:
     def save_recovery_key(self, recovery_key: RecoveryKey, filepath: str) -> bool:
         """Guardar llave de recuperación en archivo"""
         try:
-            recovery_data = asdict(recovery_key)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(recovery_data, f, indent=2, ensure_ascii=False)
+            dump_json(recovery_key.to_dict(), filepath)
             return True
         except Exception as e:
             print(f"Error guardando llave de recuperación: {e}")
@@ -127,9 +254,16 @@ class SecurityManager:
             
             # Desencriptar datos de mapeo
             salt = base64.b64decode(recovery_key.salt.encode('utf-8'))
+            legacy_fernet = not recovery_key.nonce  # Llaves anteriores a AES-GCM
             
             if password:
-                encryption_key = self._derive_key_from_password(password, salt)
+                if legacy_fernet:
+                    encryption_key = self._derive_key_from_password(password, salt)
+                else:
+                    encryption_key = self._derive_raw_key(
+                        password, salt, recovery_key.kdf_algorithm or 'sha256',
+                        recovery_key.iterations or self.key_derivation_iterations
+                    )
             elif recovery_key.encryption_key:
                 # Usar la clave almacenada (archivo sin contraseña)
                 encryption_key = base64.b64decode(recovery_key.encryption_key.encode('utf-8'))
@@ -138,97 +272,234 @@ class SecurityManager:
                 return None
             
             # Desencriptar mapeos
-            fernet = Fernet(encryption_key)
-            encrypted_mapping = base64.b64decode(recovery_key.mapping_data.encode('utf-8'))
-            decrypted_mapping = fernet.decrypt(encrypted_mapping)
+            if legacy_fernet:
+                encrypted_mapping = self._mapping_token(recovery_key)
+                decrypted_mapping = self._get_fernet(encryption_key).decrypt(encrypted_mapping)
+            else:
+                decrypted_mapping = AESGCM(encryption_key).decrypt(
+                    base64.b64decode(recovery_key.nonce.encode('utf-8')),
+                    base64.b64decode(recovery_key.mapping_data.encode('utf-8')),
+                    recovery_key.file_hash.encode('utf-8')
+                )
             
             # Deserializar mapeos
-            mapping_data = json.loads(decrypted_mapping.decode('utf-8'))
+            if orjson is not None:
+                mapping_data = orjson.loads(decrypted_mapping)
+            else:
+                mapping_data = json.loads(decrypted_mapping.decode('utf-8'))
             mappings = [MappingEntry(**mapping) for mapping in mapping_data]
             
-            # Aplicar recuperación en orden inverso (de final a inicio)
-            recovered_content = processed_content
-            mappings.sort(key=lambda x: x.position[0], reverse=True)
-            
-            for mapping in mappings:
-                start, end = mapping.position
-                # Buscar y reemplazar dummy con original
-                recovered_content = recovered_content.replace(
-                    mapping.dummy, mapping.original, 1
-                )
-            
-            return recovered_content
+            return self._restore_originals(processed_content, mappings)
             
         except Exception as e:
             print(f"Error durante la recuperación: {e}")
             return None
     
-    def create_dummy_replacements(self, detections: List[Any]) -> List[MappingEntry]:
+    def _restore_originals(self, processed_content: str, mappings: List[MappingEntry]) -> str:
+        """Reemplazar cada dummy por su original en una sola pasada de inicio a fin"""
+        mappings.sort(key=lambda x: x.position[0])
+        
+        parts = []
+        cursor = 0  # Fin del último tramo copiado del contenido procesado
+        shift = 0   # Desplazamiento acumulado entre posiciones originales y procesadas
+        for mapping in mappings:
+            start, end = mapping.position
+            dummy = mapping.dummy
+            dummy_start = start + shift
+            
+            # Si el archivo fue editado, buscar el dummy a partir de aquí
+            if dummy_start < cursor or not processed_content.startswith(dummy, dummy_start):
+                dummy_start = processed_content.find(dummy, cursor)
+                if dummy_start == -1:
+                    continue
+            
+            parts.append(processed_content[cursor:dummy_start])
+            parts.append(mapping.original)
+            cursor = dummy_start + len(dummy)
+            shift = cursor - end
+        
+        parts.append(processed_content[cursor:])
+        return "".join(parts)
+    
+    def create_dummy_replacements(self, detections: List[Any],
+                                  dummy_counters: Optional[Dict[str, int]] = None) -> List[MappingEntry]:
         """Crear reemplazos dummy para las detecciones"""
+        # dummy_counters (un defaultdict(int)) permite continuar la numeración entre
+        # llamadas, p. ej. por ventanas
         mappings = []
-        dummy_counters = {}
+        if dummy_counters is None:
+            dummy_counters = defaultdict(int)
+        generate_dummy = self._generate_dummy_text
         
         for detection in detections:
             data_type = detection.data_type.value
             
             # Incrementar contador para este tipo
-            if data_type not in dummy_counters:
-                dummy_counters[data_type] = 0
             dummy_counters[data_type] += 1
+            counter = dummy_counters[data_type]
             
             # Generar reemplazo dummy
-            dummy_text = self._generate_dummy_text(data_type, dummy_counters[data_type])
-            
-            mapping = MappingEntry(
+            mappings.append(MappingEntry(
                 original=detection.original_text,
-                dummy=dummy_text,
+                dummy=generate_dummy(data_type, counter),
                 data_type=data_type,
                 position=(detection.start_position, detection.end_position),
                 context=detection.context,
                 confidence=detection.confidence
-            )
-            
-            mappings.append(mapping)
+            ))
         
         return mappings
     
     def _generate_dummy_text(self, data_type: str, counter: int) -> str:
         """Generar texto dummy realista según el tipo de dato"""
-        dummy_patterns = {
-            'email': f'user{counter:03d}@example.com',
-            'phone': f'+1-555-{counter:04d}',
-            'ip_address': f'192.168.1.{counter % 254 + 1}',
-            'file_path': f'/home/user{counter}/document{counter}.txt',
-            'url': f'https://example{counter}.com/path',
-            'person_name': f'Person{counter:03d}',
-            'credit_card': f'4000-0000-0000-{counter:04d}',
-            'date': f'2024-01-{counter % 28 + 1:02d}',
-            'address': f'{counter} Example Street, City{counter}',
-            'api_key': f'DUMMY_API_KEY_{counter:06d}_{"a" * 32}',
-            'access_token': f'DUMMY_ACCESS_TOKEN_{counter:06d}_{"b" * 40}'
-        }
+        # Solo se formatea la plantilla del tipo pedido
+        template = self._DUMMY_TEMPLATES.get(data_type)
+        if template is None:
+            return f'DUMMY_{data_type.upper()}_{counter:03d}'
         
-        return dummy_patterns.get(data_type, f'DUMMY_{data_type.upper()}_{counter:03d}')
+        cycle = self._DUMMY_CYCLES.get(data_type)
+        if cycle:
+            counter = counter % cycle + 1
+        return template.format(counter)
     
     def _generate_file_hash(self, content: str) -> str:
         """Generar hash SHA-256 del contenido del archivo"""
         return hashlib.sha256(content.encode('utf-8')).hexdigest()
     
-    def _generate_checksum(self, mapping_data: str, file_hash: str) -> str:
-        """Generar checksum de integridad"""
-        combined = mapping_data + file_hash + self.version
-        return hashlib.sha256(combined.encode('utf-8')).hexdigest()
+    def _generate_checksum(self, mapping_data: bytes, file_hash: str) -> str:
+        """Generar checksum de integridad (mapeos ya codificados en UTF-8)"""
+        # Alimentar el hash por partes evita concatenar una copia de los mapeos
+        digest = hashlib.sha256(mapping_data)
+        digest.update(file_hash.encode('utf-8'))
+        digest.update(self.version.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _get_fernet(self, key: bytes):
+        """Obtener el cifrador Fernet de llaves antiguas (versión Rust si está disponible)"""
+        if RustFernet is not None:
+            try:
+                return RustFernet(key.decode('ascii'))
+            except (TypeError, ValueError):
+                pass  # Clave no aceptada: usar la implementación de cryptography
+        return Fernet(key)
+    
+    def _mapping_token(self, recovery_key: RecoveryKey) -> bytes:
+        """Obtener el token Fernet de los mapeos encriptados"""
+        token = recovery_key.mapping_data.encode('utf-8')
+        if token.startswith(FERNET_TOKEN_PREFIX):
+            return token
+        # Llaves antiguas: el token se guardaba envuelto en base64 otra vez
+        return base64.b64decode(token)
     
     def _derive_key_from_password(self, password: str, salt: bytes) -> bytes:
-        """Derivar clave de encriptación desde contraseña"""
+        """Derivar clave Fernet desde contraseña (llaves sin nonce)"""
+        return base64.urlsafe_b64encode(self._derive_raw_key(password, salt))
+    
+    def _derive_raw_key(self, password: str, salt: bytes, algorithm: str = 'sha256',
+                        iterations: Optional[int] = None) -> bytes:
+        """Derivar clave de encriptación de 32 bytes desde contraseña"""
+        if iterations is None:
+            iterations = self.key_derivation_iterations
+        
+        # La contraseña no se guarda en la caché: solo una huella BLAKE2 con el salt como clave
+        password_bytes = password.encode('utf-8')
+        cache_key = (
+            hashlib.blake2b(password_bytes, key=salt[:64], digest_size=16).digest(),
+            salt, algorithm, iterations
+        )
+        key = self._kdf_cache.get(cache_key)
+        if key is not None:
+            self._kdf_cache.move_to_end(cache_key)
+            return key
+        
+        # Con SHA-512 se toman los primeros 32 bytes del bloque derivado
+        key = self._pbkdf2(password_bytes, salt, algorithm, iterations)
+        
+        self._kdf_cache[cache_key] = key
+        if len(self._kdf_cache) > 32:
+            self._kdf_cache.popitem(last=False)  # Descartar la menos usada
+        return key
+    
+    def _pbkdf2(self, password_bytes: bytes, salt: bytes, algorithm: str, iterations: int) -> bytes:
+        """Ejecutar PBKDF2 sin caché (fastpbkdf2 si está disponible)"""
+        # Con SHA-512 se toman los primeros 32 bytes del bloque derivado
+        if fast_pbkdf2_hmac is not None:
+            return fast_pbkdf2_hmac(algorithm, password_bytes, salt, iterations, 32)
         kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
+            algorithm=self._KDF_ALGORITHMS[algorithm](),
             length=32,
             salt=salt,
-            iterations=self.key_derivation_iterations,
+            iterations=iterations,
         )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode('utf-8')))
-        return key
+        return kdf.derive(password_bytes)
+    
+    def get_kdf_iterations(self, algorithm: str = 'sha256') -> int:
+        """Iteraciones de PBKDF2 para llaves nuevas
+        
+        Usa la calibración de calibrate_kdf_iterations (de este proceso o guardada);
+        sin ella, el valor fijo key_derivation_iterations. Nunca mide ni escribe.
+        """
+        iterations = self._calibrated_iterations.get(algorithm)
+        if iterations is None:
+            iterations = self._load_kdf_config().get(algorithm)
+            if not isinstance(iterations, int) or iterations <= 0:
+                iterations = 0  # Sin calibración guardada: se recuerda para no releer el archivo
+            self._calibrated_iterations[algorithm] = iterations
+        # Nunca por debajo del mínimo configurado, aunque la máquina sea lenta
+        return max(iterations, self.key_derivation_iterations)
+    
+    def calibrate_kdf_iterations(self, algorithm: str = 'sha256', persist: bool = False) -> int:
+        """Calibrar las iteraciones de PBKDF2 para esta máquina
+        
+        Con persist=True el resultado se guarda en _KDF_CONFIG_PATH para otros procesos.
+        """
+        iterations = self._measure_kdf_iterations(algorithm)
+        self._calibrated_iterations[algorithm] = iterations
+        if persist:
+            stored = self._load_kdf_config()
+            stored[algorithm] = iterations
+            os.makedirs(os.path.dirname(self._KDF_CONFIG_PATH), exist_ok=True)
+            dump_json(stored, self._KDF_CONFIG_PATH)
+        return iterations
+    
+    def _measure_kdf_iterations(self, algorithm: str) -> int:
+        """Medir una derivación corta y extrapolar al tiempo objetivo"""
+        sample = self._KDF_CALIBRATION_ITERATIONS
+        start = time.perf_counter()
+        self._pbkdf2(b'calibration', b'\x00' * 32, algorithm, sample)
+        elapsed = max(time.perf_counter() - start, 1e-6)
+        
+        iterations = int(sample * self._KDF_TARGET_SECONDS / elapsed)
+        iterations = min(max(iterations, self.key_derivation_iterations), self._KDF_MAX_ITERATIONS)
+        return iterations // 1000 * 1000
+    
+    def _load_kdf_config(self) -> Dict[str, Any]:
+        """Leer las iteraciones calibradas guardadas ({} si no hay o no se puede leer)"""
+        try:
+            with open(self._KDF_CONFIG_PATH, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def clear_kdf_cache(self):
+        """Olvidar las claves derivadas en memoria"""
+        self._kdf_cache.clear()
+    
+    def _random_bytes(self, length: int) -> bytes:
+        """Tomar bytes aleatorios de la reserva, recargándola con una sola llamada al SO"""
+        with self._random_lock:  # Dos hilos nunca deben recibir los mismos bytes (nonces)
+            if self._random_pid != os.getpid():
+                # Proceso hijo tras fork: la reserva heredada ya la usa el padre
+                self._random_pool = b''
+                self._random_pid = os.getpid()
+            
+            if len(self._random_pool) < length:
+                self._random_pool = secrets.token_bytes(max(length, 256))
+            
+            chunk = self._random_pool[:length]
+            self._random_pool = self._random_pool[length:]
+        return chunk
     
     def _verify_file_integrity(self, content: str, recovery_key: RecoveryKey) -> bool:
         """Verificar que el archivo no ha sido comprometido"""
@@ -239,9 +510,9 @@ class SecurityManager:
     def generate_secure_filename(self, original_filename: str) -> str:
         """Generar nombre de archivo seguro para archivos sanitizados"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        random_suffix = secrets.token_hex(4)
-        name_part = original_filename.rsplit('.', 1)[0] if '.' in original_filename else original_filename
-        extension = original_filename.rsplit('.', 1)[1] if '.' in original_filename else 'txt'
+        random_suffix = self._random_bytes(4).hex()
+        name_part, extension = os.path.splitext(original_filename)
+        extension = extension.lstrip('.') or 'txt'
         
         return f"{name_part}_sanitized_{timestamp}_{random_suffix}.{extension}"
     
@@ -250,20 +521,33 @@ class SecurityManager:
         try:
             # Verificar que tiene todos los campos requeridos
             required_fields = ['file_hash', 'mapping_data', 'timestamp', 'version', 'salt', 'checksum']
-            recovery_dict = asdict(recovery_key)
             
             for field in required_fields:
-                if field not in recovery_dict or not recovery_dict[field]:
+                if not getattr(recovery_key, field, None):
                     return False
             
-            # Verificar que los datos base64 son válidos
-            base64.b64decode(recovery_key.mapping_data)
+            # Verificar que los datos base64 son válidos; los mapeos (el campo grande)
+            # solo se comprueban por alfabeto y longitud, sin decodificarlos
+            mapping_data = recovery_key.mapping_data
+            if recovery_key.nonce or not mapping_data.startswith(FERNET_TOKEN_PREFIX.decode('ascii')):
+                mapping_pattern = self._BASE64_RE
+            else:
+                mapping_pattern = self._BASE64_URLSAFE_RE
+            if len(mapping_data) % 4 or not mapping_pattern.fullmatch(mapping_data):
+                return False
+            
+            if recovery_key.nonce:
+                base64.b64decode(recovery_key.nonce)
             base64.b64decode(recovery_key.salt)
             
             # Si hay encryption_key, también debe ser base64 válido
             if recovery_key.encryption_key:
                 base64.b64decode(recovery_key.encryption_key)
             
+            if recovery_key.iterations is not None and (
+                    not isinstance(recovery_key.iterations, int) or recovery_key.iterations <= 0):
+                return False
+            
             # Verificar formato de timestamp
             datetime.fromisoformat(recovery_key.timestamp)
             
@@ -6,10 +6,11 @@ Interfaz gráfica principal con funcionalidad drag & drop
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-from typing import Optional, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, List
 from pathlib import Path
 
-from core.processor import FileProcessor, ProcessingResult
+from core.processor import FileProcessor, ProcessingResult, recovery_key_filename
 
 
 class DataSanitizerGUI:
@@ -21,6 +22,7 @@ class DataSanitizerGUI:
         self.processor = FileProcessor()
         self.current_file = None
         self.processing_result = None
+        self._io_pool = ThreadPoolExecutor(max_workers=2)  # Trabajo pesado fuera del hilo de Tk
         
         self._setup_window()
         self._create_widgets()
@@ -226,12 +228,12 @@ class DataSanitizerGUI:
             file_size = os.path.getsize(file_path)
             file_name = os.path.basename(file_path)
             
-            info = f"Archivo cargado: {file_name}\n"
-            info += f"Tamaño: {file_size:,} bytes\n"
-            info += f"Ruta: {file_path}\n\n"
-            info += "Listo para procesar. Use 'Vista Previa' para ver los cambios propuestos.\n"
-            
-            self._update_results_text(info)
+            self._update_results_text(
+                f"Archivo cargado: {file_name}\n"
+                f"Tamaño: {file_size:,} bytes\n"
+                f"Ruta: {file_path}\n\n"
+                "Listo para procesar. Use 'Vista Previa' para ver los cambios propuestos.\n"
+            )
         except Exception as e:
             self._update_results_text(f"Error cargando archivo: {e}")
     
@@ -250,30 +252,34 @@ class DataSanitizerGUI:
                 self._update_results_text(f"Error: {stats['error']}")
                 return
             
-            # Mostrar estadísticas
-            preview_text = "=== VISTA PREVIA DE CAMBIOS ===\n\n"
-            preview_text += f"Total de detecciones: {stats.get('total_detections', 0)}\n"
-            preview_text += f"Tamaño del archivo: {stats.get('file_size', 0):,} bytes\n\n"
+            # Mostrar estadísticas (las líneas se acumulan en una lista y se unen al final)
+            lines = [
+                "=== VISTA PREVIA DE CAMBIOS ===\n\n",
+                f"Total de detecciones: {stats.get('total_detections', 0)}\n",
+                f"Tamaño del archivo: {stats.get('file_size', 0):,} bytes\n\n"
+            ]
             
             if stats.get('total_detections', 0) > 0:
-                preview_text += "Tipos de datos detectados:\n"
+                lines.append("Tipos de datos detectados:\n")
                 for data_type, count in stats.get('by_type', {}).items():
-                    preview_text += f"  - {data_type}: {count} ocurrencias\n"
+                    lines.append(f"  - {data_type}: {count} ocurrencias\n")
                 
-                preview_text += f"\nConfianza promedio: {stats.get('average_confidence', 0):.2%}\n\n"
+                lines.append(f"\nConfianza promedio: {stats.get('average_confidence', 0):.2%}\n\n")
                 
                 # Mostrar primeras detecciones
-                preview_text += "Ejemplos de detecciones:\n"
+                lines.append("Ejemplos de detecciones:\n")
                 for i, detection in enumerate(detections[:10]):
-                    preview_text += f"{i+1}. {detection.data_type.value}: '{detection.original_text}' "
-                    preview_text += f"(confianza: {detection.confidence:.2%})\n"
+                    lines.append(
+                        f"{i+1}. {detection.data_type.value}: '{detection.original_text}' "
+                        f"(confianza: {detection.confidence:.2%})\n"
+                    )
                 
                 if len(detections) > 10:
-                    preview_text += f"... y {len(detections) - 10} más\n"
+                    lines.append(f"... y {len(detections) - 10} más\n")
             else:
-                preview_text += "No se detectaron datos sensibles en este archivo.\n"
+                lines.append("No se detectaron datos sensibles en este archivo.\n")
             
-            self._update_results_text(preview_text)
+            self._update_results_text("".join(lines))
             
         except Exception as e:
             self._update_results_text(f"Error en vista previa: {e}")
@@ -293,15 +299,24 @@ class DataSanitizerGUI:
                 return
         
         self._update_results_text("Procesando archivo...\n")
-        self.root.update()
+        
+        # Bloquear acciones sobre el archivo mientras se procesa en segundo plano
+        self.preview_button.config(state="disabled")
+        self.process_button.config(state="disabled")
+        self.save_button.config(state="disabled")
+        
+        password = self.password_var.get() or None
+        self._run_in_background(
+            self._on_process_done, self.processor.process_file, self.current_file, password=password
+        )
+    
+    def _on_process_done(self, future: Future):
+        """Mostrar el resultado del procesamiento (en el hilo de Tk)"""
+        self.preview_button.config(state="normal")
+        self.process_button.config(state="normal")
         
         try:
-            password = self.password_var.get() if self.password_var.get() else None
-            
-            result = self.processor.process_file(
-                self.current_file,
-                password=password
-            )
+            result = future.result()
             
             self.processing_result = result
             
@@ -316,33 +331,31 @@ class DataSanitizerGUI:
     
     def _display_processing_success(self, result: ProcessingResult):
         """Mostrar resultado exitoso del procesamiento"""
-        success_text = "=== PROCESAMIENTO COMPLETADO ===\n\n"
-        success_text += f"Archivo original: {result.original_filename}\n"
-        success_text += f"Archivo sanitizado: {result.sanitized_filename}\n\n"
-        
         stats = result.statistics
-        success_text += f"Detecciones totales: {stats.get('total_detections', 0)}\n"
-        success_text += f"Mapeos creados: {stats.get('mappings_created', 0)}\n"
-        success_text += f"Tamaño original: {stats.get('file_size_original', 0):,} bytes\n"
-        success_text += f"Tamaño sanitizado: {stats.get('file_size_sanitized', 0):,} bytes\n\n"
+        lines = [
+            "=== PROCESAMIENTO COMPLETADO ===\n\n",
+            f"Archivo original: {result.original_filename}\n",
+            f"Archivo sanitizado: {result.sanitized_filename}\n\n",
+            f"Detecciones totales: {stats.get('total_detections', 0)}\n",
+            f"Mapeos creados: {stats.get('mappings_created', 0)}\n",
+            f"Tamaño original: {stats.get('file_size_original', 0):,} bytes\n",
+            f"Tamaño sanitizado: {stats.get('file_size_sanitized', 0):,} bytes\n\n"
+        ]
         
         if stats.get('by_type'):
-            success_text += "Datos reemplazados por tipo:\n"
-            for data_type, count in stats['by_type'].items():
-                success_text += f"  - {data_type}: {count}\n"
+            lines.append("Datos reemplazados por tipo:\n")
+            lines.extend(f"  - {data_type}: {count}\n" for data_type, count in stats['by_type'].items())
         
-        success_text += f"\nLlave de recuperación: {'Generada' if result.recovery_key else 'No generada'}\n"
-        success_text += "\nUse 'Guardar Resultado' para exportar los archivos.\n"
+        lines.append(f"\nLlave de recuperación: {'Generada' if result.recovery_key else 'No generada'}\n")
+        lines.append("\nUse 'Guardar Resultado' para exportar los archivos.\n")
         
-        self._update_results_text(success_text)
+        self._update_results_text("".join(lines))
     
     def _display_processing_errors(self, result: ProcessingResult):
         """Mostrar errores del procesamiento"""
-        error_text = "=== ERRORES EN EL PROCESAMIENTO ===\n\n"
-        for error in result.errors:
-            error_text += f"• {error}\n"
-        
-        self._update_results_text(error_text)
+        self._update_results_text(
+            "=== ERRORES EN EL PROCESAMIENTO ===\n\n" + "".join(f"• {error}\n" for error in result.errors)
+        )
     
     def _save_result(self):
         """Guardar resultado del procesamiento"""
@@ -355,28 +368,33 @@ class DataSanitizerGUI:
         if not output_dir:
             return
         
+        # Escribir los archivos en segundo plano para no congelar la interfaz
+        self.save_button.config(state="disabled")
+        self._run_in_background(
+            lambda future: self._on_save_done(future, output_dir),
+            self._write_result_files, output_dir, self.processing_result
+        )
+    
+    def _write_result_files(self, output_dir: str, result: ProcessingResult) -> Optional[str]:
+        """Escribir archivo sanitizado y llave; devuelve el nombre de la llave guardada"""
+        # Se ejecuta ya en un hilo del pool: el procesador escribe ambos archivos sin
+        # volver a encolar trabajo en este mismo pool
+        recovery_saved = self.processor.save_output_files(
+            output_dir, result.sanitized_filename, result.sanitized_content, result.recovery_key
+        )
+        return recovery_key_filename(result.sanitized_filename) if recovery_saved else None
+    
+    def _on_save_done(self, future: Future, output_dir: str):
+        """Confirmar el guardado (en el hilo de Tk)"""
+        self.save_button.config(state="normal")
+        
         try:
-            # Guardar archivo sanitizado
-            sanitized_path = os.path.join(output_dir, self.processing_result.sanitized_filename)
-            with open(sanitized_path, 'w', encoding='utf-8') as f:
-                f.write(self.processing_result.sanitized_content)
-            
-            # Guardar llave de recuperación si existe
-            recovery_saved = False
-            if self.processing_result.recovery_key:
-                recovery_filename = self.processing_result.sanitized_filename.replace('.', '_recovery_key.')
-                if not recovery_filename.endswith('.json'):
-                    recovery_filename += '.json'
-                
-                recovery_path = os.path.join(output_dir, recovery_filename)
-                recovery_saved = self.processor.security_manager.save_recovery_key(
-                    self.processing_result.recovery_key, recovery_path
-                )
+            recovery_filename = future.result()
             
             # Mostrar confirmación
             message = f"Archivos guardados en:\n{output_dir}\n\n"
             message += f"• Archivo sanitizado: {self.processing_result.sanitized_filename}\n"
-            if recovery_saved:
+            if recovery_filename:
                 message += f"• Llave de recuperación: {recovery_filename}\n"
             
             messagebox.showinfo("Guardado completado", message)
@@ -384,11 +402,23 @@ class DataSanitizerGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Error guardando archivos: {e}")
     
+    def _run_in_background(self, on_done: Callable[[Future], None], task: Callable, *args, **kwargs):
+        """Ejecutar una tarea en el pool y llamar a on_done en el hilo de Tk al terminar"""
+        future = self._io_pool.submit(task, *args, **kwargs)
+        self.root.after(100, self._poll_future, future, on_done)
+    
+    def _poll_future(self, future: Future, on_done: Callable[[Future], None]):
+        """Comprobar periódicamente si la tarea terminó (Tk no es seguro entre hilos)"""
+        if future.done():
+            on_done(future)
+        else:
+            self.root.after(100, self._poll_future, future, on_done)
+    
     def _recover_file(self):
         """Recuperar archivo usando llave de recuperación"""
         try:
             from .recovery_window import RecoveryWindow
-            recovery_window = RecoveryWindow(self.root)
+            RecoveryWindow.show(self.root)
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo abrir la ventana de recuperación: {e}")
             print(f"Error importando recovery_window: {e}")  # Para debug
@@ -422,7 +452,10 @@ class DataSanitizerGUI:
     
     def run(self):
         """Ejecutar aplicación"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self._io_pool.shutdown(wait=False)
 
 
 if __name__ == "__main__":
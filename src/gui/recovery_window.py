@@ -6,23 +6,76 @@ Interfaz dedicada para la recuperación de datos originales
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import re
 import sys
-from typing import Optional
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
 
 # Agregar el directorio src al path para imports cuando se ejecuta independientemente
 if __name__ == "__main__":
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from core.recovery import RecoveryManager
+if TYPE_CHECKING:
+    from core.recovery import RecoveryManager
+
+# Marcas en los nombres de archivo generados al procesar
+SANITIZED_MARK = "_sanitized_"
+RECOVERY_KEY_MARK = "_recovery_key"
+
+# Una llave contiene la marca y termina en .json; un sanitizado lleva su marca y no la de llave
+_KEY_RE = re.compile(re.escape(RECOVERY_KEY_MARK) + r".*\.json$")
+_SAN_RE = re.compile(r"^(?!.*" + re.escape(RECOVERY_KEY_MARK) + r").*" + re.escape(SANITIZED_MARK))
+
+SEP = "=" * 50  # Separador del preview del contenido recuperado
+
+_ERR_NO_FILES = "Debe seleccionar tanto el archivo procesado como la llave de recuperación"
+
+
+def is_recovery_key(name: str) -> bool:
+    """Indicar si el nombre de archivo (sin directorio) corresponde a una llave de recuperación"""
+    return _KEY_RE.search(name) is not None
+
+
+def is_sanitized(name: str) -> bool:
+    """Indicar si el nombre de archivo (sin directorio) corresponde a un archivo sanitizado"""
+    return _SAN_RE.match(name) is not None
+
+
+def _chronological_key(name: str) -> tuple:
+    """Clave de orden por la marca de tiempo que sigue a '_sanitized_' (y luego por nombre)"""
+    return name.rpartition(SANITIZED_MARK)[2], name
 
 
 class RecoveryWindow:
     """Ventana dedicada para recuperación de archivos"""
     
+    # Último listado del directorio de salida, válido mientras no cambie su mtime
+    _listing_cache = {"dir": None, "mtime": 0, "sanitized": [], "keys": []}
+    
+    # Gestor de recuperación compartido por todas las ventanas (se crea al primer uso)
+    _shared_manager: Optional["RecoveryManager"] = None
+    
+    # Ventana con padre ya construida; al cerrarla se oculta y show() la reutiliza
+    _instance: Optional["RecoveryWindow"] = None
+    
+    # Caracteres del contenido recuperado que se muestran (el resto no viaja a la GUI)
+    _PREVIEW_CHARS = 500
+    
+    # Archivos listados por sección salvo que se pida ver todos
+    _MAX_LISTED_FILES = 50
+    
+    # Segundos durante los que se reutiliza el informe de una validación
+    _VALIDATION_CACHE_TTL = 600
+    
+    # Tamaño de los fragmentos en que se insertan los textos largos
+    _INSERT_CHUNK = 4096
+    
     def __init__(self, parent=None):
         """Inicializar ventana de recuperación"""
         self.parent = parent
-        self.recovery_manager = RecoveryManager()
+        self._executor = ThreadPoolExecutor(max_workers=2)  # Validación y recuperación fuera del hilo de Tk
+        self._generation = 0  # Cambia al cerrar: los resultados de tareas anteriores se descartan
         
         # Crear ventana
         self.window = tk.Toplevel(parent) if parent else tk.Tk()
@@ -35,6 +88,13 @@ class RecoveryWindow:
         self.recovery_key_var = tk.StringVar()
         self.password_var = tk.StringVar()
         self.output_file_var = tk.StringVar()
+        self._last_results_text = ""  # Contenido actual del área de resultados (None tras añadir)
+        # (procesado, mtime_ns, llave, mtime_ns) -> (instante, informe, compatible)
+        self._validation_cache = {}
+        
+        # Las claves derivadas se reutilizan entre recuperaciones con la misma contraseña
+        # (caché del SecurityManager); al cambiarla se descartan para no retenerlas
+        self.password_var.trace_add("write", lambda *args: self._clear_cached_keys())
         
         self._create_widgets()
         self._show_available_files()
@@ -44,6 +104,46 @@ class RecoveryWindow:
             self.window.transient(parent)
             self.window.grab_set()
     
+    @classmethod
+    def show(cls, parent) -> "RecoveryWindow":
+        """Mostrar la ventana de recuperación, reutilizando sus widgets si ya se creó"""
+        instance = cls._instance
+        if instance is None or instance.parent is not parent or not instance.window.winfo_exists():
+            instance = cls._instance = cls(parent)
+            return instance
+        
+        instance.window.deiconify()
+        instance.window.lift()
+        instance.window.grab_set()
+        instance._show_available_files()
+        return instance
+    
+    def _reset_fields(self):
+        """Vaciar los campos para la siguiente apertura (sin recrear widgets)"""
+        self.processed_file_var.set("")
+        self.recovery_key_var.set("")
+        self.password_var.set("")
+        self.output_file_var.set("")
+        self.show_password_var.set(False)
+        self.password_entry.config(show="*")
+        # Una tarea en curso al cerrar ya no rehabilitará los botones
+        self.progress_bar.stop()
+        self.validate_button.config(state="normal")
+        self.recover_button.config(state="disabled")
+    
+    @property
+    def recovery_manager(self) -> "RecoveryManager":
+        """Gestor de recuperación, importado al usarlo (la ventana se abre sin cargar cryptography)"""
+        if RecoveryWindow._shared_manager is None:
+            from core.recovery import RecoveryManager
+            RecoveryWindow._shared_manager = RecoveryManager()
+        return RecoveryWindow._shared_manager
+    
+    def _clear_cached_keys(self):
+        """Vaciar las claves derivadas, sin crear el gestor si aún no se usó"""
+        if RecoveryWindow._shared_manager is not None:
+            RecoveryWindow._shared_manager.clear_cached_keys()
+    
     def _create_widgets(self):
         """Crear widgets de la interfaz"""
         # Frame principal
@@ -142,7 +242,11 @@ class RecoveryWindow:
         text_frame.columnconfigure(0, weight=1)
         text_frame.rowconfigure(0, weight=1)
         
-        self.results_text = tk.Text(text_frame, wrap=tk.WORD, height=10, state="disabled")
+        # Área de solo lectura: sin historial de deshacer ni exportar la selección al sistema
+        self.results_text = tk.Text(
+            text_frame, wrap=tk.WORD, height=10, state="disabled",
+            undo=False, autoseparators=False, maxundo=0, exportselection=False
+        )
         self.results_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         scrollbar = ttk.Scrollbar(text_frame, orient="vertical", command=self.results_text.yview)
@@ -153,11 +257,12 @@ class RecoveryWindow:
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=6, column=0, columnspan=3, pady=(20, 0))
         
-        ttk.Button(
+        self.validate_button = ttk.Button(
             button_frame, 
             text="Validar Archivos", 
             command=self._validate_files
-        ).pack(side=tk.LEFT, padx=(0, 10))
+        )
+        self.validate_button.pack(side=tk.LEFT, padx=(0, 10))
         
         self.recover_button = ttk.Button(
             button_frame, 
@@ -167,11 +272,31 @@ class RecoveryWindow:
         )
         self.recover_button.pack(side=tk.LEFT, padx=(0, 10))
         
+        ttk.Button(
+            button_frame, 
+            text="🔄 Refrescar", 
+            command=self._refresh_available_files
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Button(
+            button_frame, 
+            text="Ver todos", 
+            command=lambda: self._show_available_files(show_all=True)
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        
         ttk.Button(
             button_frame, 
             text="Cerrar", 
-            command=self.window.destroy
+            command=self._close
         ).pack(side=tk.LEFT)
+        
+        # Indicador de actividad mientras se valida o recupera en segundo plano
+        self.progress_bar = ttk.Progressbar(button_frame, mode="indeterminate", length=120)
+        self.progress_bar.pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.window.protocol("WM_DELETE_WINDOW", self._close)
+        # Una ventana con padre se destruye con él: liberar entonces el pool de tareas
+        self.window.bind("<Destroy>", self._on_destroy, add="+")
     
     def _browse_processed_file(self):
         """Seleccionar archivo procesado"""
@@ -182,16 +307,18 @@ class RecoveryWindow:
         )
         
         if filename:
+            base = os.path.basename(filename)
+            
             # Verificar que no sea una llave de recuperación
-            if "_recovery_key" in filename:
+            if is_recovery_key(base):
                 self._update_results("❌ Error: Ha seleccionado una llave de recuperación.\n"
                                    "Por favor seleccione el archivo PROCESADO (sanitizado), no la llave.\n"
-                                   f"Archivo seleccionado: {os.path.basename(filename)}")
+                                   f"Archivo seleccionado: {base}")
                 return
                 
             self.processed_file_var.set(filename)
-            self._update_results("✅ Archivo procesado seleccionado: " + os.path.basename(filename) + "\n"
-                               "Ahora seleccione la llave de recuperación correspondiente.")
+            self._append_results(f"\n✅ Archivo procesado seleccionado: {base}\n"
+                                 "Ahora seleccione la llave de recuperación correspondiente.\n")
     
     def _browse_recovery_key(self):
         """Seleccionar llave de recuperación"""
@@ -202,16 +329,18 @@ class RecoveryWindow:
         )
         
         if filename:
+            base = os.path.basename(filename)
+            
             # Verificar que sea una llave de recuperación
-            if "_recovery_key" not in filename or not filename.endswith(".json"):
+            if not is_recovery_key(base):
                 self._update_results("❌ Error: El archivo seleccionado no parece ser una llave de recuperación.\n"
                                    "Las llaves deben contener '_recovery_key' y terminar en '.json'\n"
-                                   f"Archivo seleccionado: {os.path.basename(filename)}")
+                                   f"Archivo seleccionado: {base}")
                 return
                 
             self.recovery_key_var.set(filename)
-            self._update_results("✅ Llave de recuperación seleccionada: " + os.path.basename(filename) + "\n"
-                               "Ahora puede validar la compatibilidad o proceder con la recuperación.")
+            self._append_results(f"\n✅ Llave de recuperación seleccionada: {base}\n"
+                                 "Ahora puede validar la compatibilidad o proceder con la recuperación.\n")
     
     def _browse_output_file(self):
         """Seleccionar archivo de salida"""
@@ -231,121 +360,220 @@ class RecoveryWindow:
         else:
             self.password_entry.config(show="*")
     
-    def _validate_files(self):
-        """Validar compatibilidad entre archivos"""
+    def _require_inputs(self) -> Optional[Tuple[str, str]]:
+        """Leer archivo procesado y llave; avisar y devolver None si falta alguno"""
         processed_file = self.processed_file_var.get()
         recovery_key = self.recovery_key_var.get()
-        
         if not processed_file or not recovery_key:
-            messagebox.showerror("Error", "Debe seleccionar tanto el archivo procesado como la llave de recuperación")
+            messagebox.showerror("Error", _ERR_NO_FILES)
+            return None
+        return processed_file, recovery_key
+    
+    def _validate_files(self):
+        """Validar compatibilidad entre archivos"""
+        inputs = self._require_inputs()
+        if inputs is None:
+            return
+        processed_file, recovery_key = inputs
+        
+        # Mismos archivos sin modificar: reutilizar el informe anterior sin revalidar
+        cache_key = self._validation_cache_key(processed_file, recovery_key)
+        cached = self._validation_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < self._VALIDATION_CACHE_TTL:
+            _, result_text, compatible = cached
+            self._update_results(result_text)
+            self.recover_button.config(state="normal" if compatible else "disabled")
             return
         
-        self._update_results("🔍 Validando compatibilidad de archivos...\n")
-        self.window.update()
+        # Aviso provisional al final; el informe completo reemplaza el área al terminar
+        self._append_results("\n🔍 Validando compatibilidad de archivos...\n")
+        self._set_busy(True)
+        self.window.update_idletasks()  # Solo redibujar: no procesar clics pendientes
         
+        self._run_in_background(
+            lambda future: self._on_validate_done(future, cache_key),
+            self.recovery_manager.validate_recovery_compatibility, processed_file, recovery_key
+        )
+    
+    def _validation_cache_key(self, processed_file: str, recovery_key: str) -> Optional[tuple]:
+        """Clave de caché de validación; None si algún archivo no se puede consultar"""
         try:
-            validation = self.recovery_manager.validate_recovery_compatibility(
-                processed_file, recovery_key
-            )
+            return (processed_file, os.stat(processed_file).st_mtime_ns,
+                    recovery_key, os.stat(recovery_key).st_mtime_ns)
+        except OSError:
+            return None
+    
+    def _on_validate_done(self, future: Future, cache_key: Optional[tuple] = None):
+        """Mostrar el resultado de la validación (en el hilo de Tk)"""
+        self._set_busy(False)
+        
+        try:
+            validation = future.result()
+            
+            buf = []
+            app = buf.append
             
             if validation["compatible"]:
-                result_text = "✅ Archivos compatibles\n\n"
-                
                 metadata = validation["metadata"]
-                result_text += f"📊 Información:\n"
-                result_text += f"  - Hash del archivo: {metadata.get('file_hash', 'N/A')[:16]}...\n"
-                result_text += f"  - Fecha de llave: {metadata.get('recovery_timestamp', 'N/A')}\n"
-                result_text += f"  - Versión: {metadata.get('recovery_version', 'N/A')}\n"
-                result_text += f"  - Tamaño: {metadata.get('file_size', 0):,} bytes\n"
+                app("✅ Archivos compatibles\n\n")
+                app("📊 Información:\n")
+                app(f"  - Hash del archivo: {metadata.get('file_hash', 'N/A')[:16]}...\n")
+                app(f"  - Fecha de llave: {metadata.get('recovery_timestamp', 'N/A')}\n")
+                app(f"  - Versión: {metadata.get('recovery_version', 'N/A')}\n")
+                app(f"  - Tamaño: {metadata.get('file_size', 0):,} bytes\n")
                 
                 if validation["warnings"]:
-                    result_text += f"\n⚠️  Advertencias:\n"
-                    for warning in validation["warnings"]:
-                        result_text += f"  - {warning}\n"
+                    app("\n⚠️  Advertencias:\n")
+                    buf.extend(f"  - {warning}\n" for warning in validation["warnings"])
                 
-                result_text += f"\n✨ Listo para recuperar archivo\n"
+                app("\n✨ Listo para recuperar archivo\n")
                 self.recover_button.config(state="normal")
                 
             else:
-                result_text = "❌ Archivos no compatibles\n\n"
-                result_text += "🚫 Problemas encontrados:\n"
-                for issue in validation["issues"]:
-                    result_text += f"  - {issue}\n"
+                app("❌ Archivos no compatibles\n\n")
+                app("🚫 Problemas encontrados:\n")
+                buf.extend(f"  - {issue}\n" for issue in validation["issues"])
                 
                 self.recover_button.config(state="disabled")
             
+            result_text = "".join(buf)
             self._update_results(result_text)
             
+            if cache_key is not None:
+                now = time.monotonic()
+                # Descartar informes caducados antes de guardar el nuevo
+                self._validation_cache = {
+                    key: entry for key, entry in self._validation_cache.items()
+                    if now - entry[0] < self._VALIDATION_CACHE_TTL
+                }
+                self._validation_cache[cache_key] = (now, result_text, validation["compatible"])
+            
         except Exception as e:
             self._update_results(f"❌ Error durante la validación: {e}")
             self.recover_button.config(state="disabled")
     
     def _recover_file(self):
         """Realizar recuperación del archivo"""
-        processed_file = self.processed_file_var.get()
-        recovery_key = self.recovery_key_var.get()
-        password = self.password_var.get() if self.password_var.get() else None
-        output_file = self.output_file_var.get() if self.output_file_var.get() else None
-        
-        if not processed_file or not recovery_key:
-            messagebox.showerror("Error", "Debe seleccionar tanto el archivo procesado como la llave de recuperación")
+        inputs = self._require_inputs()
+        if inputs is None:
             return
-        
-        self._update_results("🔄 Recuperando archivo original...\n")
-        self.window.update()
+        processed_file, recovery_key = inputs
+        password = self.password_var.get() or None
+        output_file = self.output_file_var.get() or None
+        
+        self._append_results("\n🔄 Recuperando archivo original...\n")
+        self._set_busy(True)
+        self.window.update_idletasks()
+        
+        self._run_in_background(
+            lambda future: self._on_recover_done(future, output_file),
+            self.recovery_manager.recover_from_key_file,
+            processed_file, recovery_key, password, output_file, True, self._PREVIEW_CHARS
+        )
+    
+    def _on_recover_done(self, future: Future, output_file: Optional[str]):
+        """Mostrar el resultado de la recuperación (en el hilo de Tk)"""
+        self._set_busy(False)
         
         try:
-            result = self.recovery_manager.recover_from_key_file(
-                processed_file, recovery_key, password, output_file
-            )
+            result = future.result()
+            
+            buf = []
+            app = buf.append
             
             if result["success"]:
-                result_text = "✅ ¡Recuperación exitosa!\n\n"
+                app("✅ ¡Recuperación exitosa!\n\n")
                 
                 if output_file:
-                    result_text += f"📁 Archivo guardado en: {output_file}\n"
+                    app(f"📁 Archivo guardado en: {output_file}\n")
                 
                 metadata = result["metadata"]
-                result_text += f"\n📊 Información de recuperación:\n"
-                result_text += f"  - Hash original: {metadata.get('original_file_hash', 'N/A')[:16]}...\n"
-                result_text += f"  - Tamaño recuperado: {metadata.get('file_size', 0):,} bytes\n"
-                result_text += f"  - Fecha de recuperación: {metadata.get('recovery_date', 'N/A')}\n"
+                app("\n📊 Información de recuperación:\n")
+                app(f"  - Hash original: {metadata.get('original_file_hash', 'N/A')[:16]}...\n")
+                app(f"  - Tamaño recuperado: {metadata.get('file_size', 0):,} bytes\n")
+                app(f"  - Fecha de recuperación: {metadata.get('recovery_date', 'N/A')}\n")
                 
                 if result["warnings"]:
-                    result_text += f"\n⚠️  Advertencias:\n"
-                    for warning in result["warnings"]:
-                        result_text += f"  - {warning}\n"
+                    app("\n⚠️  Advertencias:\n")
+                    buf.extend(f"  - {warning}\n" for warning in result["warnings"])
                 
                 # Mostrar preview del contenido recuperado
-                if len(result["recovered_content"]) > 0:
-                    preview = result["recovered_content"][:500]
-                    if len(result["recovered_content"]) > 500:
-                        preview += "..."
-                    
-                    result_text += f"\n📄 Preview del contenido recuperado:\n"
-                    result_text += f"{'='*50}\n"
-                    result_text += preview
-                    result_text += f"\n{'='*50}\n"
+                preview = result.get("preview", "")
+                if preview:
+                    app("\n📄 Preview del contenido recuperado:\n")
+                    app(SEP + "\n")
+                    app(preview)
+                    if metadata.get('file_size', 0) > self._PREVIEW_CHARS:
+                        app("...")
+                    app("\n" + SEP + "\n")
                 
                 messagebox.showinfo("Éxito", "Archivo recuperado exitosamente")
                 
             else:
-                result_text = "❌ Error en la recuperación\n\n"
-                result_text += "🚫 Errores encontrados:\n"
-                for error in result["errors"]:
-                    result_text += f"  - {error}\n"
+                app("❌ Error en la recuperación\n\n")
+                app("🚫 Errores encontrados:\n")
+                buf.extend(f"  - {error}\n" for error in result["errors"])
                 
                 messagebox.showerror("Error", "La recuperación falló")
             
-            self._update_results(result_text)
+            self._update_results("".join(buf))
             
         except Exception as e:
             error_text = f"❌ Error inesperado durante la recuperación: {e}"
             self._update_results(error_text)
             messagebox.showerror("Error", f"Error inesperado: {e}")
     
-    def _show_available_files(self):
-        """Mostrar archivos disponibles para recuperación"""
+    def _set_busy(self, busy: bool):
+        """Bloquear las acciones y animar el indicador mientras hay una tarea en curso"""
+        if busy:
+            self._recover_was_enabled = self.recover_button.instate(["!disabled"])
+            self.validate_button.config(state="disabled")
+            self.recover_button.config(state="disabled")
+            self.progress_bar.start(10)
+        else:
+            self.progress_bar.stop()
+            self.validate_button.config(state="normal")
+            # La validación puede cambiarlo después según su resultado
+            self.recover_button.config(state="normal" if self._recover_was_enabled else "disabled")
+    
+    def _run_in_background(self, on_done: Callable[[Future], None], task: Callable, *args):
+        """Ejecutar una tarea en el pool y llamar a on_done en el hilo de Tk al terminar"""
+        future = self._executor.submit(task, *args)
+        self.window.after(100, self._poll_future, future, on_done, self._generation)
+    
+    def _poll_future(self, future: Future, on_done: Callable[[Future], None], generation: int):
+        """Comprobar periódicamente si la tarea terminó (Tk no es seguro entre hilos)"""
+        if generation != self._generation:
+            future.cancel()  # La ventana se cerró después de lanzarla: nadie espera el resultado
+        elif future.done():
+            on_done(future)
+        else:
+            self.window.after(100, self._poll_future, future, on_done, generation)
+    
+    def _close(self):
+        """Cerrar la ventana (con padre solo se oculta para reabrirla con show())"""
+        self._clear_cached_keys()
+        self._generation += 1
+        if self.parent:
+            self.window.grab_release()
+            self.window.withdraw()
+            self._reset_fields()
+            return
+        
+        # Ventana independiente: cerrarla termina la aplicación (_on_destroy libera el pool)
+        self.window.destroy()
+    
+    def _on_destroy(self, event):
+        """Liberar el pool al destruirse la ventana, sin esperar a las tareas en curso"""
+        if event.widget is not self.window:
+            return  # <Destroy> también llega por cada widget hijo
+        self._generation += 1
+        self._executor.shutdown(wait=False)
+        if RecoveryWindow._instance is self:
+            RecoveryWindow._instance = None
+    
+    def _show_available_files(self, show_all: bool = False):
+        """Mostrar archivos disponibles para recuperación (los más recientes de cada tipo salvo show_all)"""
         output_dir = "examples/output"
         
         if not os.path.exists(output_dir):
@@ -353,53 +581,105 @@ class RecoveryWindow:
             return
         
         try:
-            # Buscar archivos
-            sanitized_files = []
-            recovery_keys = []
+            sanitized_files, recovery_keys = self._list_output_files(output_dir)
             
-            for file in os.listdir(output_dir):
-                if "_sanitized_" in file and "_recovery_key" not in file:
-                    sanitized_files.append(file)
-                elif "_recovery_key" in file and file.endswith(".json"):
-                    recovery_keys.append(file)
-            
-            help_text = "🔄 VENTANA DE RECUPERACIÓN\n"
-            help_text += "=" * 40 + "\n\n"
+            parts = ["🔄 VENTANA DE RECUPERACIÓN\n", "=" * 40, "\n\n"]
             
             if sanitized_files:
-                help_text += f"📁 Archivos procesados disponibles ({len(sanitized_files)}):\n"
-                for f in sorted(sanitized_files):
-                    help_text += f"  • {f}\n"
-                help_text += "\n"
+                # Las listas ya vienen ordenadas de _list_output_files (más recientes primero)
+                limit = None if show_all else self._MAX_LISTED_FILES
+                parts.append(f"📁 Archivos procesados disponibles ({len(sanitized_files)}):\n")
+                self._append_file_lines(parts, sanitized_files, limit)
                 
-                help_text += f"🔑 Llaves de recuperación disponibles ({len(recovery_keys)}):\n"
-                for f in sorted(recovery_keys):
-                    help_text += f"  • {f}\n"
-                help_text += "\n"
+                parts.append(f"🔑 Llaves de recuperación disponibles ({len(recovery_keys)}):\n")
+                self._append_file_lines(parts, recovery_keys, limit)
                 
-                help_text += "📋 INSTRUCCIONES:\n"
-                help_text += "1. Seleccione un archivo PROCESADO (sin '_recovery_key')\n"
-                help_text += "2. Seleccione la llave CORRESPONDIENTE (con '_recovery_key')\n"
-                help_text += "3. Introduzca la contraseña si la usó al procesar\n"
-                help_text += "4. Valide compatibilidad (recomendado)\n"
-                help_text += "5. Proceda con la recuperación\n"
+                parts.append(
+                    "📋 INSTRUCCIONES:\n"
+                    "1. Seleccione un archivo PROCESADO (sin '_recovery_key')\n"
+                    "2. Seleccione la llave CORRESPONDIENTE (con '_recovery_key')\n"
+                    "3. Introduzca la contraseña si la usó al procesar\n"
+                    "4. Valide compatibilidad (recomendado)\n"
+                    "5. Proceda con la recuperación\n"
+                )
                 
             else:
-                help_text += "❌ No se encontraron archivos procesados.\n"
-                help_text += "   Ejecute primero: ./run_cli.sh demo\n"
-                help_text += "   O procese un archivo desde la ventana principal.\n"
+                parts.append(
+                    "❌ No se encontraron archivos procesados.\n"
+                    "   Ejecute primero: ./run_cli.sh demo\n"
+                    "   O procese un archivo desde la ventana principal.\n"
+                )
             
-            self._update_results(help_text)
+            self._update_results("".join(parts))
             
         except Exception as e:
             self._update_results(f"❌ Error listando archivos: {e}")
     
+    def _append_file_lines(self, parts: list, names: list, limit: Optional[int]):
+        """Añadir una línea por archivo, hasta limit, y un resumen de los omitidos"""
+        shown = names if limit is None else names[:limit]
+        parts.extend(f"  • {f}\n" for f in shown)
+        if len(names) > len(shown):
+            parts.append(f"  ... y {len(names) - len(shown)} más (use 'Ver todos')\n")
+        parts.append("\n")
+    
+    def _list_output_files(self, output_dir: str):
+        """Listar archivos sanitizados y llaves, reutilizando la caché si el directorio no cambió"""
+        cache = RecoveryWindow._listing_cache
+        mtime = os.stat(output_dir).st_mtime_ns
+        if cache["dir"] == output_dir and cache["mtime"] == mtime:
+            return cache["sanitized"], cache["keys"]
+        
+        # Buscar archivos en una sola pasada por el directorio
+        sanitized_files = []
+        recovery_keys = []
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                # is_file() (sin stat en la mayoría de sistemas) solo para las entradas que coinciden
+                name = entry.name
+                if is_recovery_key(name):
+                    if entry.is_file():
+                        recovery_keys.append(name)
+                elif is_sanitized(name) and entry.is_file():
+                    sanitized_files.append(name)
+        
+        # Ordenar una vez al escanear, en el sitio; la caché guarda las listas ya ordenadas.
+        # Lo que sigue a '_sanitized_' empieza por la marca de tiempo: los más recientes
+        # primero, y cada llave queda en la misma posición que su archivo sanitizado
+        sanitized_files.sort(key=_chronological_key, reverse=True)
+        recovery_keys.sort(key=_chronological_key, reverse=True)
+        
+        cache.update(dir=output_dir, mtime=mtime, sanitized=sanitized_files, keys=recovery_keys)
+        return sanitized_files, recovery_keys
+    
+    def _refresh_available_files(self):
+        """Volver a leer el directorio de salida ignorando la caché"""
+        RecoveryWindow._listing_cache["mtime"] = 0
+        self._show_available_files()
+    
     def _update_results(self, text: str):
         """Actualizar texto de resultados"""
+        if text == self._last_results_text:
+            return  # Mismo contenido: evitar borrar y redibujar el widget
+        
         self.results_text.config(state="normal")
         self.results_text.delete(1.0, tk.END)
-        self.results_text.insert(1.0, text)
+        self.results_text.mark_set("insert", "1.0")
+        if len(text) <= self._INSERT_CHUNK:
+            self.results_text.insert(tk.END, text)
+        else:
+            # Textos largos por fragmentos, sin una única cadena Tcl gigante
+            for start in range(0, len(text), self._INSERT_CHUNK):
+                self.results_text.insert(tk.END, text[start:start + self._INSERT_CHUNK])
+        self.results_text.config(state="disabled")
+        self._last_results_text = text
+    
+    def _append_results(self, text: str):
+        """Añadir texto al final de los resultados sin borrar lo anterior"""
+        self.results_text.config(state="normal")
+        self.results_text.insert(tk.END, text)
         self.results_text.config(state="disabled")
+        self._last_results_text = None
     
     def run(self):
         """Ejecutar ventana (solo si no tiene padre)"""
@@ -0,0 +1,9 @@
+"""
+Configuración común de pytest
+Permite importar los módulos como core.* igual que main.py y cli.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,98 @@
+"""
+Tests del detector de datos sensibles
+"""
+
+import os
+
+import pytest
+
+from core import detector as detector_module
+from core.detector import SensitiveDataDetector
+
+
+def _as_tuples(detections):
+    return [(d.data_type, d.original_text, d.start_position, d.end_position, d.confidence)
+            for d in detections]
+
+
+GOLDEN_SAMPLES = [
+    ("Mi email es juan.perez@techcorp.com y mi teléfono es +1-555-0123", [
+        ("email", "juan.perez@techcorp.com", 12, 35, 0.95),
+        ("phone", "+1-555-0123", 53, 64, 0.9),
+    ]),
+    ("Servidor 192.168.1.100 puerto 8080, web https://api.ejemplo.com/v1/users", [
+        ("ip_address", "192.168.1.100", 9, 22, 0.95),
+        ("url", "https://api.ejemplo.com/v1/users", 40, 72, 0.8),
+    ]),
+    ("Logs en /var/log/application.log y datos en /home/usuario/db/production.db", [
+        ("file_path", "/home/usuario/db/production.db", 44, 74, 0.9),
+    ]),
+    ("Tarjeta: 4000-1234-5678-9012, nacimiento 15/03/1985, SSN 123-45-6789", [
+        ("date", "15/03/1985", 41, 51, 0.8),
+    ]),
+    ("OPENAI_API_KEY=sk-abcdefghijklmnopqrstuvwxyz123456 token", [
+        ("api_key", "abcdefghijklmnopqrstuvwxyz123456", 18, 50, 0.85),
+    ]),
+    ("Windows: C:\\Users\\juan\\Documents\\informe.docx", [
+        ("file_path", "C:\\Users\\juan\\Documents\\informe.docx", 9, 45, 0.8),
+    ]),
+    ("Dirección: 123 Main Street, Springfield", []),
+]
+
+
+@pytest.mark.parametrize("text, expected", GOLDEN_SAMPLES)
+def test_detections_match_fixed_samples(text, expected):
+    """Resultados de referencia (los mismos que daba el detector original)"""
+    detections = SensitiveDataDetector().detect_all(text)
+    assert [(d.data_type.value, d.original_text, d.start_position, d.end_position,
+             round(d.confidence, 2)) for d in detections] == expected
+
+
+def test_non_ascii_url_is_detected():
+    detections = SensitiveDataDetector().detect_all("https://日本.jp/a")
+    assert [d.original_text for d in detections] == ["https://日本.jp/a"]
+
+
+@pytest.mark.parametrize("token", ["A" * 40, "Ab3" * 15, "A" * 32, "Ab3" * 11])
+def test_low_entropy_runs_are_not_flagged(token):
+    """Rachas repetitivas no son keys ni tokens, ni siquiera reclasificadas"""
+    detections = SensitiveDataDetector().detect_all(f"valor: {token} fin")
+    assert detections == []
+
+
+@pytest.mark.parametrize("token, data_type", [
+    ("Zx9Qw2Er7Ty1Ui5Op3As8Df4Gh6Jk0Lm", "api_key"),  # 32 caracteres
+    ("Zx9Qw2Er7Ty1Ui5Op3As8Df4Gh6Jk0LmNbVcXz+/aB", "access_token"),  # 42, con +/
+])
+def test_random_generic_keys_and_tokens_are_flagged(token, data_type):
+    detections = SensitiveDataDetector().detect_all(f"valor: {token} fin")
+    assert [(d.data_type.value, d.original_text) for d in detections] == [(data_type, token)]
+
+
+PARALLEL_SAMPLE = (
+    "Contacto: juan.perez@techcorp.com, +1-555-0123, IP 192.168.1.100\n"
+    "Ruta /home/usuario/db/production.db y web https://api.ejemplo.com/v1\n"
+    "Tarjeta 4000-1234-5678-9012, fecha 15/03/1985, key Zx9Qw2Er7Ty1Ui5Op3As8Df4Gh6Jk0Lm\n"
+)
+
+
+@pytest.fixture
+def parallel_pool():
+    yield
+    detector_module._shutdown_parallel_pool()
+
+
+def test_parallel_detection_matches_sequential_and_reuses_pool(parallel_pool, monkeypatch):
+    """El pool compartido da el mismo resultado que el modo secuencial y no se recrea"""
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    text = PARALLEL_SAMPLE * 50
+    sequential = _as_tuples(SensitiveDataDetector().detect_all(text))
+    
+    detector = SensitiveDataDetector()
+    detector.parallel_threshold = 1
+    assert _as_tuples(detector.detect_all(text)) == sequential
+    pool = detector_module._parallel_pool
+    assert pool is not None
+    
+    assert _as_tuples(detector.detect_all(text)) == sequential
+    assert detector_module._parallel_pool is pool
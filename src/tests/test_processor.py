@@ -0,0 +1,124 @@
+"""
+Tests del procesador de archivos
+"""
+
+import hashlib
+
+import pytest
+
+from core.detector import SensitiveDataType, get_default_detector
+from core.processor import FileProcessor, recovery_key_filename
+
+
+ORIGINAL = (
+    "Mi email es juan.perez@techcorp.com\n"
+    "Servidor 192.168.1.100 y datos en /home/usuario/db/production.db\n"
+    "Fecha: 15/03/1985, áéíóú ñ\n"
+)
+
+
+@pytest.mark.parametrize("password", [None, "secreto"])
+def test_process_and_recover_round_trip(tmp_path, password):
+    """process_file -> recover_file devuelve exactamente el archivo original"""
+    input_file = tmp_path / "datos.txt"
+    input_file.write_text(ORIGINAL, encoding="utf-8")
+    output_dir = tmp_path / "salida"
+    
+    result = FileProcessor().process_file(str(input_file), str(output_dir), password)
+    assert result.success, result.errors
+    assert "juan.perez@techcorp.com" not in result.sanitized_content
+    
+    sanitized_path = output_dir / result.sanitized_filename
+    key_path = output_dir / recovery_key_filename(result.sanitized_filename)
+    recovered_path = tmp_path / "recuperado.txt"
+    
+    success, content, errors = FileProcessor().recover_file(
+        str(sanitized_path), str(key_path), password, str(recovered_path)
+    )
+    assert success, errors
+    assert content == ORIGINAL
+    assert recovered_path.read_text(encoding="utf-8") == ORIGINAL
+
+
+def test_custom_patterns_are_detected_and_unknown_types_ignored(tmp_path):
+    """Los patrones personalizados se aplican sin tocar el detector compartido"""
+    input_file = tmp_path / "config.txt"
+    input_file.write_text("clave interna secreto-4821 y nada más\n", encoding="utf-8")
+    
+    processor = FileProcessor()
+    result = processor.process_file(
+        str(input_file),
+        custom_patterns={"api_key": [r"SECRETO-\d+"], "tipo_inexistente": [r"nada"]}
+    )
+    
+    assert result.success, result.errors
+    assert result.statistics["by_type"] == {"api_key": 1}
+    assert "secreto-4821" not in result.sanitized_content
+    assert "nada más" in result.sanitized_content
+    
+    assert processor.detector is not get_default_detector()
+    assert get_default_detector().detect_all("secreto-4821") == []
+
+
+def test_only_unknown_custom_types_keep_the_shared_detector(tmp_path):
+    input_file = tmp_path / "notas.txt"
+    input_file.write_text("sin datos sensibles\n", encoding="utf-8")
+    
+    processor = FileProcessor()
+    result = processor.process_file(str(input_file), custom_patterns={"desconocido": [r"datos"]})
+    
+    assert result.success, result.errors
+    assert result.statistics["total_detections"] == 0
+    assert processor.detector is get_default_detector()
+
+
+def test_file_hash_is_of_the_decoded_content(tmp_path):
+    """CRLF y latin-1: el hash es el del texto normalizado, en memoria o por ventanas"""
+    input_file = tmp_path / "windows.txt"
+    input_file.write_bytes("Correo juan.perez@techcorp.com\r\nAño 15/03/1985\r\n".encode("latin-1"))
+    expected = hashlib.sha256("Correo juan.perez@techcorp.com\nAño 15/03/1985\n".encode("utf-8")).hexdigest()
+    
+    processor = FileProcessor()
+    in_memory = processor.process_file(str(input_file))
+    streamed = processor.process_file_streaming(str(input_file), str(tmp_path / "salida"))
+    
+    assert in_memory.success and streamed.success, in_memory.errors + streamed.errors
+    assert in_memory.recovery_key.file_hash == expected
+    assert streamed.recovery_key.file_hash == expected
+
+
+def test_repeated_custom_patterns_are_not_duplicated(tmp_path):
+    """Procesar varias veces con los mismos patrones no acumula regex repetidas"""
+    input_file = tmp_path / "config.txt"
+    input_file.write_text("clave interna secreto-4821\n", encoding="utf-8")
+    custom_patterns = {"api_key": [r"SECRETO-\d+", r"SECRETO-\d+"]}
+    
+    processor = FileProcessor()
+    processor.process_file(str(input_file), custom_patterns=custom_patterns)
+    api_key_patterns = list(processor.detector.patterns[SensitiveDataType.API_KEY])
+    result = processor.process_file(str(input_file), custom_patterns=custom_patterns)
+    
+    assert result.statistics["by_type"] == {"api_key": 1}
+    assert processor.detector.patterns[SensitiveDataType.API_KEY] == api_key_patterns
+    assert len(api_key_patterns) == len(get_default_detector().patterns[SensitiveDataType.API_KEY]) + 1
+
+
+def test_streaming_windows_do_not_split_a_token_run(tmp_path):
+    """Sin saltos de línea, el corte entre ventanas no parte una racha base64 en dos"""
+    text = ("inicio " + "A" * 150 + "Zx9Qw2Er7Ty1Ui5Op3As8Df4Gh6Jk0LmNbVcXz+/aBqR"
+            + " fin juan.perez@techcorp.com " + "x " * 40)
+    input_file = tmp_path / "una_linea.txt"
+    input_file.write_text(text, encoding="utf-8")
+    expected = {}
+    for detection in get_default_detector().detect_all(text):
+        expected[detection.data_type.value] = expected.get(detection.data_type.value, 0) + 1
+    assert expected == {"email": 1}
+    
+    for window, overlap in [(64, 16), (100, 10), (150, 40)]:
+        processor = FileProcessor()
+        processor._STREAM_WINDOW_SIZE = window
+        processor._STREAM_OVERLAP = overlap
+        result = processor.process_file_streaming(str(input_file), str(tmp_path / "salida"))
+        
+        assert result.success, result.errors
+        assert result.statistics["by_type"] == expected
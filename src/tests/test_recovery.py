@@ -0,0 +1,63 @@
+"""
+Tests del gestor de recuperación
+"""
+
+import os
+
+import pytest
+
+from core.processor import FileProcessor, recovery_key_filename
+from core.recovery import RecoveryManager
+
+
+@pytest.fixture
+def processed_pair(tmp_path):
+    """Archivo sanitizado y su llave, recién generados"""
+    input_file = tmp_path / "datos.txt"
+    input_file.write_text("Correo juan.perez@techcorp.com\n", encoding="utf-8")
+    result = FileProcessor().process_file(str(input_file), str(tmp_path))
+    assert result.success, result.errors
+    return (str(tmp_path / result.sanitized_filename),
+            str(tmp_path / recovery_key_filename(result.sanitized_filename)))
+
+
+@pytest.fixture
+def counted_checks(monkeypatch):
+    """Contar las verificaciones de integridad realmente ejecutadas"""
+    calls = []
+    original = RecoveryManager._perform_integrity_check
+    
+    def counting(self, content, recovery_key):
+        calls.append(content)
+        return original(self, content, recovery_key)
+    
+    monkeypatch.setattr(RecoveryManager, "_perform_integrity_check", counting)
+    return calls
+
+
+def test_recovery_reuses_the_integrity_check_of_a_validation(processed_pair, counted_checks):
+    processed_file, key_file = processed_pair
+    manager = RecoveryManager()
+    
+    assert manager.validate_recovery_compatibility(processed_file, key_file)["compatible"]
+    result = manager.recover_from_key_file(processed_file, key_file)
+    
+    assert result["success"], result["errors"]
+    assert len(counted_checks) == 1
+    assert result["warnings"] == []
+
+
+def test_modified_file_is_checked_again(processed_pair, counted_checks):
+    processed_file, key_file = processed_pair
+    manager = RecoveryManager()
+    manager.validate_recovery_compatibility(processed_file, key_file)
+    
+    # Vaciar el archivo tras validarlo: la recuperación debe verlo
+    with open(processed_file, "w", encoding="utf-8"):
+        pass
+    st = os.stat(processed_file)
+    os.utime(processed_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    result = manager.recover_from_key_file(processed_file, key_file)
+    
+    assert len(counted_checks) == 2
+    assert "El archivo procesado está vacío" in result["warnings"]
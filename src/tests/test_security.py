@@ -0,0 +1,135 @@
+"""
+Tests del gestor de seguridad
+"""
+
+import base64
+import hashlib
+import json
+import secrets
+from datetime import datetime
+
+import pytest
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+from core.detector import get_default_detector
+from core.security import SecurityManager, RecoveryKey
+
+
+ORIGINAL = "Escribir a juan.perez@techcorp.com o llamar al +1-555-0123 desde 192.168.1.100\n"
+
+
+def _sanitize(manager, text):
+    """Mapeos y contenido sanitizado del texto (sin pasar por el procesador)"""
+    mappings = manager.create_dummy_replacements(get_default_detector().detect_all(text))
+    parts, previous_end = [], 0
+    for mapping in mappings:
+        start, end = mapping.position
+        parts.extend((text[previous_end:start], mapping.dummy))
+        previous_end = end
+    parts.append(text[previous_end:])
+    return mappings, "".join(parts)
+
+
+def _legacy_fernet_key(mappings, text, password=None):
+    """Llave como las generaba la versión 1.0.0 (Fernet, sin nonce)"""
+    salt = secrets.token_bytes(32)
+    stored_key = None
+    if password:
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=100000)
+        encryption_key = base64.urlsafe_b64encode(kdf.derive(password.encode('utf-8')))
+    else:
+        encryption_key = Fernet.generate_key()
+        stored_key = base64.b64encode(encryption_key).decode('utf-8')
+    
+    mapping_json = json.dumps([m.to_dict() for m in mappings], ensure_ascii=False, indent=2)
+    token = Fernet(encryption_key).encrypt(mapping_json.encode('utf-8'))
+    file_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return RecoveryKey(
+        file_hash=file_hash,
+        mapping_data=base64.b64encode(token).decode('utf-8'),
+        timestamp=datetime.now().isoformat(),
+        version="1.0.0",
+        salt=base64.b64encode(salt).decode('utf-8'),
+        checksum=hashlib.sha256((mapping_json + file_hash + "1.0.0").encode('utf-8')).hexdigest(),
+        encryption_key=stored_key
+    )
+
+
+@pytest.mark.parametrize("password", [None, "secreto"])
+def test_aes_gcm_round_trip(password):
+    manager = SecurityManager()
+    mappings, processed = _sanitize(manager, ORIGINAL)
+    assert len(mappings) == 3 and processed != ORIGINAL
+    
+    key = manager.generate_recovery_key(mappings, ORIGINAL, password)
+    assert key.nonce is not None
+    assert (key.encryption_key is None) == (password is not None)
+    
+    assert SecurityManager().recover_original_data(processed, key, password) == ORIGINAL
+
+
+def test_aes_gcm_rejects_wrong_password():
+    manager = SecurityManager()
+    mappings, processed = _sanitize(manager, ORIGINAL)
+    key = manager.generate_recovery_key(mappings, ORIGINAL, "secreto")
+    
+    assert SecurityManager().recover_original_data(processed, key, "otra") is None
+
+
+@pytest.mark.parametrize("password", [None, "secreto"])
+def test_legacy_fernet_round_trip(password):
+    """Las llaves Fernet sin nonce de versiones anteriores siguen recuperándose"""
+    manager = SecurityManager()
+    mappings, processed = _sanitize(manager, ORIGINAL)
+    key = _legacy_fernet_key(mappings, ORIGINAL, password)
+    
+    assert manager.recover_original_data(processed, key, password) == ORIGINAL
+
+
+@pytest.fixture
+def kdf_config(tmp_path, monkeypatch):
+    """Ruta de calibración aislada y sin calibraciones previas en el proceso"""
+    path = tmp_path / "kdf.json"
+    monkeypatch.setattr(SecurityManager, "_KDF_CONFIG_PATH", str(path))
+    monkeypatch.setattr(SecurityManager, "_calibrated_iterations", {})
+    return path
+
+
+def test_new_keys_use_fixed_iterations_without_writing(kdf_config):
+    """Sin calibración explícita no se mide ni se escribe nada en disco"""
+    manager = SecurityManager()
+    key = manager.generate_recovery_key([], "contenido", password="secreto")
+    
+    assert key.iterations == manager.key_derivation_iterations
+    assert not kdf_config.exists()
+
+
+def test_calibration_is_persisted_only_on_request(kdf_config):
+    manager = SecurityManager()
+    iterations = manager.calibrate_kdf_iterations('sha256')
+    assert not kdf_config.exists()
+    assert manager.get_kdf_iterations('sha256') == iterations
+    
+    manager.calibrate_kdf_iterations('sha256', persist=True)
+    stored = json.loads(kdf_config.read_text(encoding='utf-8'))
+    assert stored['sha256'] >= manager.key_derivation_iterations
+
+
+def test_missing_calibration_is_read_once(kdf_config, monkeypatch):
+    """Sin kdf.json, generar varias llaves no vuelve a leer la configuración"""
+    reads = []
+    original = SecurityManager._load_kdf_config
+    
+    def counting(self):
+        reads.append(1)
+        return original(self)
+    
+    monkeypatch.setattr(SecurityManager, "_load_kdf_config", counting)
+    manager = SecurityManager()
+    for _ in range(3):
+        assert manager.get_kdf_iterations('sha256') == manager.key_derivation_iterations
+    assert SecurityManager().get_kdf_iterations('sha256') == manager.key_derivation_iterations
+    
+    assert len(reads) == 1